@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import pathlib
+import random
+import sys
+import time
+from typing import Callable
+
+import build_rulesets
+
+
+FUZZ_PREFIXES = [
+    "", "", "", " ", "\t", "||", "||", "|", "@@||", "!", "#", ";", "[", "0.0.0.0 ", "127.0.0.1\t", "::1 ", ":: ",
+    "|http://", "|https://", "|HTTP://", "DOMAIN,", "DOMAIN-SUFFIX,", "+.", ".", "*.", "||*.", "IP-CIDR,",
+    "/", "-", "&", "_", "$", "^", "?", "~", "%", "'", "\"", "\u212a",
+]
+FUZZ_HOSTS = [
+    "example.com", "ads.example.co.uk", "Tracker.NET", "x", "1.2.3.4", "01.2.3.4", "10.0.0.0/8", "[::1]",
+    "2001:db8::1", "a_b.com", "-bad-.com", "xn--fiqs8s.cn", "a.b.c.d.e.f.g", "localhost", "exämple.com",
+    "user@host.com", "host.com.", "0.0.0.0", "",
+]
+FUZZ_SUFFIXES = [
+    "", "", "", "^", "^", "/", "/path?q=1", "$third-party", "^$script,domain=a.com", "##.banner", "#@#.ad",
+    "#?#div", " # comment", "#", ":8080", ":8080^", "^|", " ", "\t", "|", "@", "$", "^ junk", " 1.2.3.4",
+    ";x", "\r", " ", "\x0b",
+]
+
+
+def log(msg: str) -> None:
+    print(f"[bench] {msg}")
+
+
+def easylist_corpus(size: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    hosts = [
+        f"{rnd.choice(['ads', 'cdn', 'trk', 'img', 'stat', 'pixel'])}{i}.{rnd.choice(['com', 'net', 'io', 'cn'])}"
+        for i in range(max(1, size // 2))
+    ]
+    lines = ["[Adblock Plus 2.0]", "! Title: synthetic"]
+    for i in range(size):
+        host = rnd.choice(hosts)
+        roll = rnd.random()
+        if roll < 0.4:
+            lines.append(f"||{host}^")
+        elif roll < 0.5:
+            lines.append(f"||{host}^$third-party,script")
+        elif roll < 0.7:
+            lines.append(f"{host}##.banner-{i}")
+        elif roll < 0.75:
+            lines.append(f"@@||{host}^$document")
+        elif roll < 0.8:
+            lines.append(f"0.0.0.0 {host}")
+        elif roll < 0.83:
+            lines.append(f"|https://{host}/ad/{i}.js")
+        elif roll < 0.88:
+            lines.append(f"! comment {i}")
+        elif roll < 0.93:
+            lines.append(f"/banner/{i}/*")
+        else:
+            lines.append(f"-ad-{i}-")
+    return "\n".join(lines) + "\n"
+
+
+def fuzz_corpus(size: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    lines: list[str] = []
+    for _ in range(size):
+        line = rnd.choice(FUZZ_PREFIXES) + rnd.choice(FUZZ_HOSTS) + rnd.choice(FUZZ_SUFFIXES)
+        if rnd.random() < 0.3:
+            line += rnd.choice(FUZZ_SUFFIXES)
+        lines.append(line)
+    return "".join(line + rnd.choice(["\n", "\n", "\n", "\r\n", "\r"]) for line in lines)
+
+
+def compare_lines(name: str, text: str) -> bool:
+    # Whole-feed sets can hide a wrong rule that another line also produces.
+    failures = 0
+    for line in sorted(set(text.splitlines())):
+        expected = build_rulesets.parse_adblock_text(line)
+        actual = build_rulesets.parse_adblock_buffer(line)
+        if expected != actual:
+            failures += 1
+            if failures <= 10:
+                log(f"- {line!r}: per-line={sorted(expected)} buffer={sorted(actual)}")
+    if failures:
+        log(f"FAILED {name}: {failures} line(s) differ")
+        return False
+    log(f"{name}: every line identical")
+    return True
+
+
+def compare(name: str, text: str) -> bool:
+    expected = build_rulesets.parse_adblock_text(text)
+    actual = build_rulesets.parse_adblock_buffer(text)
+    if expected == actual:
+        log(f"{name}: identical ({len(expected)} rules)")
+        return True
+    log(f"FAILED {name}: {len(expected - actual)} missing, {len(actual - expected)} extra")
+    for rule in sorted(expected - actual)[:10]:
+        log(f"- missing {rule!r}")
+    for rule in sorted(actual - expected)[:10]:
+        log(f"- extra {rule!r}")
+    return False
+
+
+def time_it(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        build_rulesets.DOMAIN_MEMO.clear()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Differential check and throughput benchmark for the adblock parsers.")
+    parser.add_argument(
+        "--input",
+        type=pathlib.Path,
+        action="append",
+        default=[],
+        help="Adblock / hosts feed to check and time (repeatable; default: synthetic EasyList-sized feed)",
+    )
+    parser.add_argument("--size", type=int, default=80000, help="Synthetic feed size in lines (default: 80000)")
+    parser.add_argument("--fuzz-lines", type=int, default=200000, help="Randomised edge-case lines (default: 200000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per parser; best is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=1, help="Corpus RNG seed (default: 1)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    feeds = [(str(path), path.read_text(encoding="utf-8-sig", errors="ignore")) for path in args.input]
+    if not feeds:
+        feeds = [("synthetic", easylist_corpus(max(1, args.size), args.seed))]
+
+    ok = all(compare(name, text) for name, text in feeds)
+    if args.fuzz_lines > 0:
+        fuzz = fuzz_corpus(args.fuzz_lines, args.seed)
+        ok = compare("fuzz", fuzz) and compare_lines("fuzz", fuzz) and ok
+    if not ok:
+        return 1
+
+    for name, text in feeds:
+        line_count = len(text.splitlines())
+        legacy = time_it(lambda: build_rulesets.parse_adblock_text(text), max(1, args.repeat))
+        buffer = time_it(lambda: build_rulesets.parse_adblock_buffer(text), max(1, args.repeat))
+        log(
+            f"{name}: {line_count} lines  "
+            f"per-line {line_count / legacy:,.0f} lines/s  "
+            f"buffer {line_count / buffer:,.0f} lines/s  x{legacy / buffer:.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import pathlib
+import random
+import sys
+import time
+from typing import Any, Callable
+
+import build_rulesets
+
+
+def log(msg: str) -> None:
+    print(f"[bench] {msg}")
+
+
+def legacy_collapse(tokens: list[str]) -> set[str]:
+    # One ipaddress object per token, then ipaddress.collapse_addresses; kept as the reference.
+    ipv4: list[ipaddress.IPv4Network] = []
+    ipv6: list[ipaddress.IPv6Network] = []
+    for token in tokens:
+        try:
+            network = ipaddress.ip_network(token, strict=False)
+        except ValueError:
+            continue
+        if isinstance(network, ipaddress.IPv4Network):
+            ipv4.append(network)
+        else:
+            ipv6.append(network)
+    rules = {build_rulesets.format_ip_rule(network) for network in ipaddress.collapse_addresses(ipv4)}
+    rules.update(build_rulesets.format_ip_rule(network) for network in ipaddress.collapse_addresses(ipv6))
+    return rules
+
+
+def read_tokens(paths: list[pathlib.Path]) -> list[str]:
+    tokens: list[str] = []
+    for path in paths:
+        for raw in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+            line = raw.strip()
+            if line.startswith(("IP-CIDR,", "IP-CIDR6,")):
+                tokens.append(line.split(",", 2)[1])
+    return tokens
+
+
+def synthetic_tokens(size: int, seed: int) -> list[str]:
+    """
+    APNIC / cloud-feed shaped mix: IPv4 blocks of /8-/32 clustered in a few
+    /8s (so many are adjacent or nested), and IPv6 /32-/64 blocks.
+    """
+    rnd = random.Random(seed)
+    tokens: list[str] = []
+    for _ in range(size):
+        if rnd.random() < 0.7:
+            prefix = rnd.randint(8, 32)
+            address = (rnd.choice([1, 14, 36, 42, 58, 101, 110, 120, 180, 223]) << 24) | rnd.getrandbits(24)
+            tokens.append(f"{ipaddress.IPv4Address(address)}/{prefix}")
+        else:
+            prefix = rnd.randint(32, 64)
+            address = (0x2400 << 112) | (rnd.getrandbits(20) << 88)
+            tokens.append(f"{ipaddress.IPv6Address(address)}/{prefix}")
+    return tokens
+
+
+def time_it(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Differential check and benchmark for the integer CIDR engine.")
+    parser.add_argument(
+        "--input",
+        type=pathlib.Path,
+        action="append",
+        default=[],
+        help="Rule list to take IP-CIDR rules from (repeatable; default: synthetic corpus)",
+    )
+    parser.add_argument("--size", type=int, default=60000, help="Synthetic corpus size in CIDRs (default: 60000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per variant; best is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=1, help="Corpus RNG seed (default: 1)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    tokens = read_tokens(args.input) if args.input else synthetic_tokens(max(1, args.size), args.seed)
+    log(f"corpus: {len(tokens)} CIDRs")
+
+    numpy_module = build_rulesets.np
+    variants: list[tuple[str, Callable[[], set[str]]]] = [("legacy", lambda: legacy_collapse(tokens))]
+
+    def pure_python() -> set[str]:
+        build_rulesets.np = None
+        try:
+            return build_rulesets.collapse_cidr_tokens(tokens)
+        finally:
+            build_rulesets.np = numpy_module
+
+    variants.append(("python", pure_python))
+    if numpy_module is not None:
+        variants.append(("numpy", lambda: build_rulesets.collapse_cidr_tokens(tokens)))
+    else:
+        log("numpy not installed; timing the pure-Python engine only")
+
+    expected = legacy_collapse(tokens)
+    for name, func in variants[1:]:
+        actual = func()
+        if actual != expected:
+            log(f"FAILED: {name} engine differs ({len(expected - actual)} missing, {len(actual - expected)} extra)")
+            for rule in sorted(expected ^ actual)[:10]:
+                log(f"- {rule}")
+            return 1
+    log(f"results identical to ipaddress.collapse_addresses ({len(expected)} rules)")
+
+    baseline = 0.0
+    for name, func in variants:
+        elapsed = time_it(func, max(1, args.repeat))
+        baseline = baseline or elapsed
+        log(f"{name:<7} {elapsed * 1000.0:8.1f} ms  x{baseline / elapsed:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
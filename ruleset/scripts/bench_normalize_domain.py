@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import pathlib
+import random
+import sys
+import time
+from typing import Any, Callable
+
+import build_rulesets
+from build_rulesets import DOMAIN_RE
+
+
+def log(msg: str) -> None:
+    print(f"[bench] {msg}")
+
+
+def legacy_normalize_domain(value: str) -> str | None:
+    # normalize_domain as it was before the fast path; kept as the reference.
+    value = value.strip().strip("\"'").lower()
+    if not value:
+        return None
+
+    if value.startswith("||"):
+        value = value[2:]
+    if value.startswith("*."):
+        value = value[2:]
+    if value.startswith("+."):
+        value = value[2:]
+    value = value.lstrip(".")
+    value = value.split("^", 1)[0]
+    value = value.split("/", 1)[0]
+
+    if value.startswith("[") and value.endswith("]"):
+        return None
+
+    if ":" in value and value.count(":") == 1:
+        host, maybe_port = value.rsplit(":", 1)
+        if maybe_port.isdigit():
+            value = host
+
+    value = value.strip(".")
+    if not value:
+        return None
+
+    try:
+        ipaddress.ip_address(value)
+        return None
+    except ValueError:
+        pass
+
+    if not DOMAIN_RE.fullmatch(value):
+        return None
+    return value
+
+
+def read_hostnames(paths: list[pathlib.Path]) -> list[str]:
+    hostnames: list[str] = []
+    for path in paths:
+        for raw in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+            line = raw.strip()
+            if not line or line.startswith(("#", "!", "[", "payload:")):
+                continue
+            if "," in line:
+                line = line.split(",")[1]
+            hostnames.append(line.strip("-' "))
+    return hostnames
+
+
+def build_corpus(hostnames: list[str], size: int, seed: int) -> list[str]:
+    """
+    EasyList-shaped token mix: mostly bare and ||-anchored hostnames (with
+    repeats), plus ports, wildcards, mixed case, IP literals and junk.
+    """
+    rnd = random.Random(seed)
+    if not hostnames:
+        hostnames = [f"host{i}.example{i % 97}.com" for i in range(20000)]
+    corpus: list[str] = []
+    for _ in range(size):
+        host = rnd.choice(hostnames)
+        roll = rnd.random()
+        if roll < 0.35:
+            corpus.append(host)
+        elif roll < 0.65:
+            corpus.append(f"||{host}^")
+        elif roll < 0.72:
+            corpus.append(f"*.{host}")
+        elif roll < 0.77:
+            corpus.append(f"{host}:{rnd.choice([80, 443, 8080])}")
+        elif roll < 0.82:
+            corpus.append(f"{host.upper()}.")
+        elif roll < 0.88:
+            corpus.append(f"{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(0, 299)}")
+        elif roll < 0.9:
+            corpus.append(f"0{rnd.randint(0, 99)}.1.2.3")
+        elif roll < 0.92:
+            corpus.append(f"[2001:db8::{rnd.randint(0, 65535):x}]")
+        elif roll < 0.94:
+            corpus.append(f"2001:db8::{rnd.randint(0, 65535):x}")
+        elif roll < 0.96:
+            corpus.append(f"/banner{rnd.randint(0, 999)}/*")
+        else:
+            corpus.append(f"-{host}-ad-")
+    return corpus
+
+
+def time_it(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Micro-benchmark normalize_domain against the legacy implementation.")
+    parser.add_argument(
+        "--input",
+        type=pathlib.Path,
+        action="append",
+        default=[],
+        help="Hostname or rule list to sample tokens from (repeatable; default: ruleset/dist/surge/*.list)",
+    )
+    parser.add_argument("--size", type=int, default=80000, help="Corpus size in tokens (default: 80000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per variant; best is reported (default: 5)")
+    parser.add_argument("--seed", type=int, default=1, help="Corpus RNG seed (default: 1)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    inputs = args.input or sorted(pathlib.Path("ruleset/dist/surge").glob("*.list"))
+    corpus = build_corpus(read_hostnames(inputs), max(1, args.size), args.seed)
+    log(f"corpus: {len(corpus)} tokens, {len(set(corpus))} distinct, from {len(inputs)} input file(s)")
+
+    expected = [legacy_normalize_domain(token) for token in corpus]
+    build_rulesets.DOMAIN_MEMO.clear()
+    for name, actual in (
+        ("normalize_domain", [build_rulesets.normalize_domain(token) for token in corpus]),
+        ("normalize_domains", build_rulesets.normalize_domains(corpus)),
+    ):
+        mismatches = [(token, want, got) for token, want, got in zip(corpus, expected, actual) if want != got]
+        if mismatches:
+            log(f"FAILED: {name} differs from legacy on {len(mismatches)} token(s)")
+            for token, want, got in mismatches[:20]:
+                log(f"- {token!r}: legacy={want!r} new={got!r}")
+            return 1
+    log("results identical to legacy implementation")
+
+    def cold_memo(func: Callable[[], Any]) -> Callable[[], Any]:
+        def run() -> Any:
+            build_rulesets.DOMAIN_MEMO.clear()
+            return func()
+
+        return run
+
+    variants: list[tuple[str, Callable[[], Any]]] = [
+        ("legacy", lambda: [legacy_normalize_domain(token) for token in corpus]),
+        ("uncached", lambda: [build_rulesets.normalize_domain_uncached(token) for token in corpus]),
+        ("memo cold", cold_memo(lambda: [build_rulesets.normalize_domain(token) for token in corpus])),
+        ("memo warm", lambda: [build_rulesets.normalize_domain(token) for token in corpus]),
+        ("batch cold", cold_memo(lambda: build_rulesets.normalize_domains(corpus))),
+        ("batch warm", lambda: build_rulesets.normalize_domains(corpus)),
+    ]
+    baseline = 0.0
+    for name, func in variants:
+        elapsed = time_it(func, max(1, args.repeat))
+        baseline = baseline or elapsed
+        log(
+            f"{name:<10} {elapsed * 1000.0:8.1f} ms  {len(corpus) / elapsed:12,.0f} tokens/s  "
+            f"x{baseline / elapsed:.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
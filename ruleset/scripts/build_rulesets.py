@@ -2,33 +2,163 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import codecs
 import csv
 import datetime as dt
+import errno
+import gzip
 import hashlib
+import http.client
+import io
 import ipaddress
 import json
+import multiprocessing
+import os
 import pathlib
+import queue
+import random
 import re
 import shutil
+import socket
+import ssl
 import sys
+import tarfile
 import tempfile
+import threading
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
-from collections import defaultdict
-from dataclasses import dataclass
-from typing import Any
+import zipfile
+import zlib
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Any, BinaryIO, Iterable, Iterator
+
+try:  # optional codecs; gzip/deflate are always available
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+try:  # optional; the CIDR engine has a pure-Python path with identical results
+    import numpy as np  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
 
 ROOT_DIR = pathlib.Path(__file__).resolve().parents[1]
 DEFAULT_CONFIG_PATH = ROOT_DIR / "config" / "sources.json"
 DEFAULT_POLICY_PATH = ROOT_DIR / "config" / "policy_map.json"
 DEFAULT_DIST_DIR = ROOT_DIR / "dist"
 DEFAULT_CACHE_DIR = ROOT_DIR / ".cache"
+CACHE_INDEX_NAME = "index.json"
+BUILD_STATE_NAME = "build_state.json"
+# Files in the cache dir that are not cache entries and must never be evicted.
+CACHE_RESERVED_NAMES = {CACHE_INDEX_NAME, BUILD_STATE_NAME}
+BUILD_STATE_VERSION = 1
+# Bumped when rule counts change meaning (2: IP rules collapsed to minimal CIDRs).
+RULE_COUNT_VERSION = 2
+DEFAULT_CACHE_KEEP_BUILDS = 4
+DEFAULT_CACHE_MAX_MB = 512
 
 USER_AGENT = "self-owned-ruleset-builder/1.0"
+DEFAULT_FETCH_CONCURRENCY = 8
+DEFAULT_FETCH_PER_HOST = 4
+DEFAULT_HEDGE_DELAY = 8.0
+FETCH_TIMEOUT = 45
+HTTP_POOL_IDLE_TIMEOUT = 30.0
+HTTP_MAX_REDIRECTS = 5
+HTTP_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+HTTP_RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+HTTP_READ_CHUNK_BYTES = 64 * 1024
+RETRYABLE_ERRNOS = {
+    errno.ECONNABORTED,
+    errno.ECONNREFUSED,
+    errno.ECONNRESET,
+    errno.EHOSTUNREACH,
+    errno.ENETUNREACH,
+    errno.EPIPE,
+    errno.ETIMEDOUT,
+}
+DEFAULT_FETCH_RETRIES = 2
+DEFAULT_BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 120.0
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 20.0
+PARSED_CACHE_SUFFIX = ".rules.gz"
+APNIC_INDEX_SUFFIX = ".apnic.json.gz"
+APNIC_INDEX_VERSION = 1
+# Bump a parser's version whenever its output can change for identical input;
+# persisted parse results are keyed by it.
+PARSER_VERSIONS = {
+    "adblock": 1,
+    "plain_cidr": 2,
+    "csv_cidr_first_column": 2,
+    "telegram_cidr": 2,
+    "iana_special_csv": 2,
+    "aws_ip_ranges": 2,
+    "gcp_ip_ranges": 2,
+    "iana_tld_list": 1,
+}
+# Parsers whose output is a collapsed CIDR set.
+CIDR_PARSERS = {
+    "aws_ip_ranges",
+    "csv_cidr_first_column",
+    "gcp_ip_ranges",
+    "iana_special_csv",
+    "plain_cidr",
+    "telegram_cidr",
+}
+# Below this many ranges the list-based merge beats building NumPy arrays.
+CIDR_NUMPY_MIN_RANGES = 1024
+DEFAULT_PARSE_JOBS = 0
+DEFAULT_CATEGORY_WORKERS = 4
+DEFAULT_WRITE_WORKERS = 4
+RENDER_CHUNK_LINES = 8192
+# Parsers worth a round trip to a worker process, and the subset whose output
+# is a per-line union so a body can be split into line-aligned chunks (CIDR
+# parsers collapse the merged chunk results again).
+PROCESS_PARSERS = {"adblock", "csv_cidr_first_column", "plain_cidr", "telegram_cidr"}
+CHUNKED_PARSERS = {"adblock", "plain_cidr", "telegram_cidr"}
+PARSE_OFFLOAD_MIN_BYTES = 256 * 1024
+PARSE_CHUNK_BYTES = 1024 * 1024
 FETCH_MEMO: dict[str, tuple[bytes, bool]] = {}
 FETCH_EVENTS: dict[str, dict[str, str]] = {}
-FETCH_MODE_PRIORITY = {"network": 0, "offline_cache": 1, "fallback_cache": 2}
+FETCH_TIMINGS: dict[str, dict[str, Any]] = {}
+FETCH_FAILURES: dict[str, str] = {}
+FETCH_WINNERS: dict[tuple[str, ...], str] = {}
+FETCH_RACES: list[dict[str, Any]] = []
+FETCH_RETRIES: dict[str, int] = {}
+FETCH_LOCK = threading.Lock()
+LOG_LOCK = threading.Lock()
+CACHE_CODEC = "gzip"
+# cache key -> {"ref": ..., "files": [...]} for every cache entry touched by this build.
+CACHE_USAGE: dict[str, dict[str, Any]] = {}
+V2FLY_SUBTREE_MEMO: dict[tuple[str, frozenset[str], frozenset[str], frozenset[str]], tuple[frozenset[str], bool]] = {}
+V2FLY_SUBTREE_STATS: dict[str, int] = {"hits": 0, "misses": 0}
+PARSE_CACHE_STATS: dict[str, int] = {"hits": 0, "misses": 0}
+# Hostnames repeat heavily across feeds; the memo is dropped wholesale when full.
+DOMAIN_MEMO_LIMIT = 1 << 18
+DOMAIN_MEMO: dict[str, str | None] = {}
+# parse cache key -> pending worker results (one per chunk) for this build.
+PARSE_FUTURES: dict[str, list[Future[bytes]]] = {}
+# APNIC index key -> country -> merged (IPv4, IPv6) ranges, shared by every country source.
+APNIC_INDEXES: dict[str, dict[str, tuple[list[tuple[int, int]], list[tuple[int, int]]]]] = {}
+APNIC_INDEX_LOCK = threading.Lock()
+# Incremental build inputs: "url:" / "v2fly:" key -> sha256 of the body, and
+# v2fly list URL -> URLs it includes, both for this build.
+BODY_DIGESTS: dict[str, str] = {}
+V2FLY_INCLUDES: dict[str, set[str]] = {}
+# Rule payload -> its one shared instance, for this build's RuleLists.
+RULE_PAYLOADS: dict[str, str] = {}
+FETCH_MODE_PRIORITY = {"network": 0, "not_modified": 1, "offline_cache": 2, "fallback_cache": 3}
 
 RULE_ORDER = {
     "DOMAIN": 0,
@@ -39,6 +169,8 @@ RULE_ORDER = {
     "IP-CIDR": 5,
     "IP-CIDR6": 6,
 }
+RULE_TYPES = tuple(sorted(RULE_ORDER, key=RULE_ORDER.__getitem__))
+IP_RULE_CODES = frozenset({RULE_ORDER["IP-CIDR"], RULE_ORDER["IP-CIDR6"]})
 
 ALLOWED_ACTIONS = {
     "DIRECT",
@@ -49,6 +181,10 @@ ALLOWED_ACTIONS = {
     "UNSPECIFIED",
 }
 REJECT_ACTIONS = {"REJECT", "REJECT-DROP", "REJECT-NO-DROP"}
+# Conflict pass: intentionally layered reject sets and overlay sets that overlap by design.
+REJECT_LIKE_CATEGORIES = frozenset({"reject", "reject_extra", "reject_drop", "reject_no_drop"})
+OVERLAY_CATEGORIES = frozenset({"gfw", "global", "tld_proxy"})
+SEVERITY_WEIGHT = {"high": 0, "medium": 1, "low": 2}
 
 HOST_LINE_RE = re.compile(r"^(?:0\.0\.0\.0|127\.0\.0\.1|::1|::)\s+([^\s#;]+)")
 FOOTNOTE_RE = re.compile(r"\s*\[[0-9]+\]\s*$")
@@ -56,6 +192,35 @@ DOMAIN_RE = re.compile(
     r"^(?=.{1,253}$)(?!-)(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9][a-z0-9-]{0,62}$"
 )
 DUPLICATE_ARTIFACT_RE = re.compile(r"^.+ [0-9]+(?:\.[A-Za-z0-9_-]+)?$")
+V2FLY_INCLUDE_RE = re.compile(r"^[ \t]*include:[ \t]*([^\s#]+)", re.IGNORECASE | re.MULTILINE)
+# ipaddress.ip_network() cannot accept anything else (bar an IPv6 "%scope").
+IP_NETWORK_CHARS_RE = re.compile(r"[0-9A-Fa-f.:/]+")
+IPV4_OCTET = r"(25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])"
+# Canonical dotted-quad with an optional decimal prefix; anything else goes through ipaddress.
+IPV4_CIDR_RE = re.compile(rf"{IPV4_OCTET}\.{IPV4_OCTET}\.{IPV4_OCTET}\.{IPV4_OCTET}(?:/(3[0-2]|[12]?[0-9]))?")
+# Line boundaries recognised by str.splitlines() besides "\n".
+LINE_BREAK_RE = re.compile("[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+# One alternative per line shape parse_adblock_line handles; each fast shape is
+# restricted to lines where that function takes exactly the same branch.
+ADBLOCK_LINE_RE = re.compile(
+    r"^(?:"
+    # blank, comment, header and @@ exception lines, plus URL-fragment rules
+    # ("/ads/*", "-banner-", "&adtype=") that can never normalize to a host
+    r"(?P<skip>[ \t]*|[ \t]*(?:[!\[#;/&_=?,%~^$-]|@@)[^\n]*)"
+    # ||host^... / ||host/... / ||host$... with no '#' anywhere on the line
+    r"|\|\|(?P<suffix>[^\s^/$#|]+)(?=[\^/$]|$)[^#\n]*"
+    # hosts-file lines; a lone '#' comment is fine, cosmetic markers are not
+    r"|(?:0\.0\.0\.0|127\.0\.0\.1|::1|::)[ \t]+(?P<host>[^\s#;$]+)(?:[^#\n]|#(?![#@?]))*"
+    # |http(s)://host[:port] followed by a path, query, options or nothing
+    r"|\|https?://(?P<url>[A-Za-z0-9.-]+)(?::[0-9]+)?(?=[/?$]|$)[^#\n]*"
+    # bare hostnames; the letter rules out IPv4 literals and CIDRs
+    r"|(?P<bare>(?=[A-Za-z0-9._-]*[A-Za-z])[A-Za-z0-9][A-Za-z0-9._-]*)"
+    # element hiding and snippet rules anywhere on the line
+    r"|(?P<cosmetic>[^\n]*?(?:##|#@#|#\?#)[^\n]*)"
+    r"|(?P<other>[^\n]*)"
+    r")$",
+    re.MULTILINE,
+)
 
 
 class BuildError(RuntimeError):
@@ -67,10 +232,362 @@ class SourceBuildResult:
     rules: set[str]
     used_cache: bool
     source_ref: str
+    parse_cache_hit: bool = False
+
+
+@dataclass
+class RuleList:
+    """
+    Rules of one category in output order, bucketed by type.
+
+    buckets[code] holds the sorted payloads of the rule type ranked `code` in
+    RULE_ORDER, so the buckets concatenated are the output order. Payloads
+    are shared through RULE_PAYLOADS across categories; "TYPE,payload" text
+    is only produced when iterating.
+    """
+
+    buckets: list[list[str]] = field(default_factory=lambda: [[] for _ in RULE_TYPES])
+
+    @classmethod
+    def from_rules(cls, rules: Iterable[str]) -> RuleList:
+        result = cls()
+        buckets = result.buckets
+        for rule in rules:
+            rule_type, _, payload = rule.partition(",")
+            code = RULE_ORDER.get(rule_type)
+            if code is None:
+                raise BuildError(f"unsupported rule type: {rule_type}")
+            buckets[code].append(RULE_PAYLOADS.setdefault(payload, payload))
+        for bucket in buckets:
+            bucket.sort()
+        return result
+
+    def select(self, codes: Iterable[int]) -> RuleList:
+        # Shares the bucket lists; nothing is copied.
+        wanted = set(codes)
+        return RuleList([bucket if code in wanted else [] for code, bucket in enumerate(self.buckets)])
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self.buckets)
+
+    def __iter__(self) -> Iterator[str]:
+        return (f"{rule_type},{payload}" for rule_type, bucket in zip(RULE_TYPES, self.buckets) for payload in bucket)
+
+
+@dataclass
+class CategoryBuildResult:
+    category_id: str
+    rules: RuleList
+    action: str
+    metadata: dict[str, Any]
+    state: dict[str, Any] = field(default_factory=dict)
+    reused: bool = False
+    bytes_written: int = 0
+    render_seconds: float = 0.0
+
+
+@dataclass
+class FetchSettings:
+    hedge_delay: float = DEFAULT_HEDGE_DELAY
+    retries: int = DEFAULT_FETCH_RETRIES
+
+
+class CircuitOpenError(urllib.error.URLError):
+    pass
+
+
+class FetchAbandoned(urllib.error.URLError):
+    pass
+
+
+@dataclass
+class V2flyArchive:
+    """
+    In-memory copy of domain-list-community data/, keyed by list name.
+
+    Per-file URLs under one of `prefixes` are served from `files` instead of
+    being fetched one by one.
+    """
+
+    url: str = ""
+    prefixes: tuple[str, ...] = ()
+    files: dict[str, bytes] = field(default_factory=dict)
+    used_cache: bool = False
+    served: int = 0
+
+    def reset(self, prefixes: tuple[str, ...] = ()) -> None:
+        self.url = ""
+        self.prefixes = prefixes
+        self.files = {}
+        self.used_cache = False
+        self.served = 0
+
+    def list_name(self, url: str) -> str:
+        for prefix in self.prefixes:
+            if url.startswith(prefix):
+                name = url[len(prefix) :]
+                if name in self.files:
+                    return name
+        return ""
+
+    def read(self, url: str) -> bytes | None:
+        name = self.list_name(url)
+        if not name:
+            return None
+        with FETCH_LOCK:
+            self.served += 1
+        return self.files[name]
+
+    def snapshot(self) -> dict[str, Any]:
+        if not self.files:
+            return {"enabled": bool(self.prefixes), "loaded": False}
+        return {
+            "enabled": True,
+            "loaded": True,
+            "url": self.url,
+            "used_cache": self.used_cache,
+            "list_count": len(self.files),
+            "served_lookups": self.served,
+        }
+
+
+class HostCircuitBreaker:
+    """
+    Stop contacting a host after `threshold` consecutive retryable failures.
+
+    While open, requests fail immediately (so fetch_bytes goes straight to
+    its cache fallback). After `cooldown` seconds one trial request is let
+    through; success closes the breaker, failure keeps it open.
+    """
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures: dict[str, int] = defaultdict(int)
+        self._opened_at: dict[str, float] = {}
+        self.trips: dict[str, int] = defaultdict(int)
+        self.short_circuited: dict[str, int] = defaultdict(int)
+
+    def reset(self, threshold: int) -> None:
+        with self._lock:
+            self.threshold = threshold
+            self._failures.clear()
+            self._opened_at.clear()
+            self.trips.clear()
+            self.short_circuited.clear()
+
+    def allow(self, host: str) -> bool:
+        if self.threshold <= 0:
+            return True
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - opened_at >= self.cooldown:
+                # Half-open: let this request probe the host, keep others out meanwhile.
+                self._opened_at[host] = now
+                return True
+            self.short_circuited[host] += 1
+            return False
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str) -> bool:
+        if self.threshold <= 0:
+            return False
+        with self._lock:
+            self._failures[host] += 1
+            if host in self._opened_at or self._failures[host] < self.threshold:
+                return host in self._opened_at
+            self._opened_at[host] = time.monotonic()
+            self.trips[host] += 1
+        log(f"warning: circuit breaker opened for {host} after {self.threshold} consecutive failures")
+        return True
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened_at
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "cooldown_s": self.cooldown,
+                "open_hosts": sorted(self._opened_at),
+                "trips": dict(sorted(self.trips.items())),
+                "short_circuited": dict(sorted(self.short_circuited.items())),
+            }
+
+
+@dataclass
+class HedgeSignal:
+    abandoned: threading.Event
+    answered: threading.Event
+
+    def claim(self) -> bool:
+        # Decides the race before any memo, cache or report side effect: the
+        # first request to claim wins, and the others stop at their next chunk.
+        with FETCH_LOCK:
+            if self.abandoned.is_set():
+                return False
+            self.abandoned.set()
+            return True
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    reason: str
+    headers: http.client.HTTPMessage
+    body: bytes
+
+
+def read_body(response: Any, cancel: threading.Event | None) -> bytes:
+    if cancel is None:
+        return response.read()
+    parts: list[bytes] = []
+    while chunk := response.read(HTTP_READ_CHUNK_BYTES):
+        if cancel.is_set():
+            raise FetchAbandoned("a faster mirror answered")
+        parts.append(chunk)
+    return b"".join(parts)
+
+
+class HTTPConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections per (scheme, host, port).
+
+    Connections are checked out for one request at a time and returned when
+    the body has been read. At most `max_idle_per_host` idle connections are
+    kept per host, and idle connections older than `idle_timeout` are closed
+    instead of reused.
+    """
+
+    def __init__(self, max_idle_per_host: int, idle_timeout: float) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._idle: dict[tuple[str, str, int], list[tuple[http.client.HTTPConnection, float]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._ssl_context: ssl.SSLContext | None = None
+        self.stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0, "idle_expired": 0}
+
+    def reset(self, max_idle_per_host: int) -> None:
+        self.close()
+        self.max_idle_per_host = max_idle_per_host
+        with self._lock:
+            self.stats = {key: 0 for key in self.stats}
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self) -> None:
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
+
+    def _checkout(self, key: tuple[str, str, int], timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        stale: list[http.client.HTTPConnection] = []
+        reused_conn: http.client.HTTPConnection | None = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    reused_conn = conn
+                    break
+                stale.append(conn)
+            self.stats["idle_expired"] += len(stale)
+        for conn in stale:
+            conn.close()
+        if reused_conn is not None:
+            reused_conn.timeout = timeout
+            if reused_conn.sock is not None:
+                reused_conn.sock.settimeout(timeout)
+            return reused_conn, True
+
+        scheme, host, port = key
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _checkin(self, key: tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def request(
+        self,
+        url: str,
+        headers: dict[str, str],
+        timeout: float,
+        on_response: Any = None,
+        cancel: threading.Event | None = None,
+    ) -> HttpResponse:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in {"http", "https"} or not parts.hostname:
+            raise urllib.error.URLError(f"unsupported URL: {url}")
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        for attempt in range(2):
+            conn, reused = self._checkout(key, timeout)
+            with self._lock:
+                self.stats["connections_reused" if reused else "connections_opened"] += 1
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+                if on_response is not None:
+                    on_response(response.status)
+                # An abandoned transfer raises here; the half-read connection is closed below.
+                body = read_body(response, cancel)
+            except (ConnectionError, http.client.BadStatusLine) as exc:
+                conn.close()
+                if reused and attempt == 0:
+                    # The server dropped an idle keep-alive connection; retry on a fresh one.
+                    continue
+                raise urllib.error.URLError(exc) from exc
+            except http.client.HTTPException as exc:
+                conn.close()
+                raise urllib.error.URLError(exc) from exc
+            except OSError:
+                conn.close()
+                raise
+
+            with self._lock:
+                self.stats["requests"] += 1
+            if response.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return HttpResponse(response.status, response.reason, response.headers, body)
+        raise urllib.error.URLError(f"connection reset for {url}")
+
+
+FETCH_SETTINGS = FetchSettings()
+HTTP_POOL = HTTPConnectionPool(max_idle_per_host=DEFAULT_FETCH_PER_HOST, idle_timeout=HTTP_POOL_IDLE_TIMEOUT)
+HOST_BREAKER = HostCircuitBreaker(threshold=DEFAULT_BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN)
+V2FLY_ARCHIVE = V2flyArchive()
 
 
 def log(message: str) -> None:
-    print(f"[ruleset] {message}")
+    # Category workers log concurrently; keep each line in one piece.
+    with LOG_LOCK:
+        print(f"[ruleset] {message}")
 
 
 def action_family(action: str) -> str:
@@ -83,23 +600,34 @@ def action_family(action: str) -> str:
 
 
 def record_fetch_event(url: str, mode: str, error: str = "") -> None:
-    current = FETCH_EVENTS.get(url)
-    if current is None:
-        FETCH_EVENTS[url] = {"mode": mode, "error": error}
-        return
-
-    current_prio = FETCH_MODE_PRIORITY.get(current.get("mode", "network"), 0)
-    mode_prio = FETCH_MODE_PRIORITY.get(mode, 0)
-    if mode_prio > current_prio:
-        FETCH_EVENTS[url] = {"mode": mode, "error": error}
-        return
-
-    if error and not current.get("error"):
-        current["error"] = error
+    with FETCH_LOCK:
+        current = FETCH_EVENTS.get(url)
+        if current is None:
+            FETCH_EVENTS[url] = {"mode": mode, "error": error}
+            return
+
+        current_prio = FETCH_MODE_PRIORITY.get(current.get("mode", "network"), 0)
+        mode_prio = FETCH_MODE_PRIORITY.get(mode, 0)
+        if mode_prio > current_prio:
+            FETCH_EVENTS[url] = {"mode": mode, "error": error}
+            return
+
+        if error and not current.get("error"):
+            current["error"] = error
+
+
+def record_fetch_timing(url: str, started: float, size: int, wire_size: int = 0) -> None:
+    with FETCH_LOCK:
+        FETCH_TIMINGS[url] = {
+            "elapsed_ms": round((time.monotonic() - started) * 1000.0, 1),
+            "bytes": size,
+            "wire_bytes": wire_size,
+        }
 
 
-def build_fetch_report() -> dict[str, Any]:
+def build_fetch_report(prefetch: dict[str, Any] | None = None) -> dict[str, Any]:
     network_success_count = 0
+    not_modified_count = 0
     offline_cache_count = 0
     fallback_cache_count = 0
     fallback_events: list[dict[str, str]] = []
@@ -109,6 +637,8 @@ def build_fetch_report() -> dict[str, Any]:
         mode = item.get("mode", "network")
         if mode == "network":
             network_success_count += 1
+        elif mode == "not_modified":
+            not_modified_count += 1
         elif mode == "offline_cache":
             offline_cache_count += 1
         elif mode == "fallback_cache":
@@ -119,13 +649,72 @@ def build_fetch_report() -> dict[str, Any]:
                 out["error"] = error
             fallback_events.append(out)
 
+    timings: list[dict[str, Any]] = []
+    for url in sorted(FETCH_TIMINGS):
+        timings.append({"url": url, "mode": FETCH_EVENTS.get(url, {}).get("mode", ""), **FETCH_TIMINGS[url]})
+    races = [summarize_race(race) for race in FETCH_RACES]
+    races.sort(key=lambda item: (-float(item["latency_saved_ms"]), item["primary"]))
+    wire_bytes_total = sum(int(item.get("wire_bytes", 0)) for item in timings)
+    decoded_bytes_total = sum(int(item.get("bytes", 0)) for item in timings if item.get("wire_bytes"))
+
     return {
         "generated_at_utc": dt.datetime.now(dt.timezone.utc).isoformat(),
         "url_count": len(FETCH_EVENTS),
         "network_success_count": network_success_count,
+        "not_modified_count": not_modified_count,
         "offline_cache_count": offline_cache_count,
         "fallback_cache_count": fallback_cache_count,
         "fallback_events": fallback_events,
+        "prefetch": prefetch or {"enabled": False},
+        "connection_pool": connection_pool_report(),
+        "retry_count": sum(FETCH_RETRIES.values()),
+        "retried_urls": [{"url": url, "retries": FETCH_RETRIES[url]} for url in sorted(FETCH_RETRIES)],
+        "circuit_breaker": HOST_BREAKER.snapshot(),
+        "v2fly_archive": V2FLY_ARCHIVE.snapshot(),
+        "hedge_delay_s": FETCH_SETTINGS.hedge_delay,
+        "hedge_mirror_win_count": sum(1 for item in races if item["winner_index"] > 0),
+        "hedged_fetches": races,
+        "wire_bytes_total": wire_bytes_total,
+        "decoded_bytes_total": decoded_bytes_total,
+        "timings": timings,
+    }
+
+
+def connection_pool_report() -> dict[str, Any]:
+    stats = HTTP_POOL.snapshot()
+    stats["handshakes_saved"] = stats["connections_reused"]
+    stats["max_idle_per_host"] = HTTP_POOL.max_idle_per_host
+    stats["idle_timeout_s"] = HTTP_POOL.idle_timeout
+    return stats
+
+
+def summarize_race(race: dict[str, Any]) -> dict[str, Any]:
+    # Estimate what strict in-order fetching would have cost compared with the race.
+    with FETCH_LOCK:
+        primary = dict(race["outcomes"].get(0, {}))
+        winner = dict(race["outcomes"].get(race["winner_index"], {}))
+    elapsed_ms = float(race["elapsed_ms"])
+    lower_bound = False
+    if race["winner_index"] == 0:
+        saved_ms = 0.0
+    elif not primary:
+        # Primary still had not answered when the report was written.
+        saved_ms = (time.monotonic() - race["started"]) * 1000.0 - elapsed_ms
+        lower_bound = True
+    elif primary["ok"]:
+        saved_ms = float(primary["elapsed_ms"]) - elapsed_ms
+    else:
+        saved_ms = float(primary["elapsed_ms"]) + float(winner.get("elapsed_ms", 0.0)) - elapsed_ms
+    return {
+        "primary": race["candidates"][0],
+        "winner": race["candidates"][race["winner_index"]],
+        "winner_index": race["winner_index"],
+        "launched": race["launched"],
+        "elapsed_ms": round(elapsed_ms, 1),
+        "primary_elapsed_ms": round(float(primary["elapsed_ms"]), 1) if primary else None,
+        "primary_outcome": ("ok" if primary["ok"] else "error") if primary else "pending",
+        "latency_saved_ms": round(max(saved_ms, 0.0), 1),
+        "latency_saved_is_lower_bound": lower_bound,
     }
 
 
@@ -149,6 +738,35 @@ def purge_duplicate_artifacts(base_dir: pathlib.Path) -> int:
 
 
 def normalize_domain(value: str) -> str | None:
+    # normalize_domain never returns "", so it doubles as the cache-miss marker.
+    result = DOMAIN_MEMO.get(value, "")
+    if result == "":
+        result = normalize_domain_uncached(value)
+        if len(DOMAIN_MEMO) >= DOMAIN_MEMO_LIMIT:
+            DOMAIN_MEMO.clear()
+        DOMAIN_MEMO[value] = result
+    return result
+
+
+def normalize_domains(values: Iterable[str]) -> list[str | None]:
+    memo = DOMAIN_MEMO
+    results: list[str | None] = []
+    for value in values:
+        result = memo.get(value, "")
+        if result == "":
+            result = normalize_domain_uncached(value)
+            if len(memo) >= DOMAIN_MEMO_LIMIT:
+                memo.clear()
+            memo[value] = result
+        results.append(result)
+    return results
+
+
+def normalize_domain_uncached(value: str) -> str | None:
+    if DOMAIN_RE.fullmatch(value):
+        # Already canonical: every cleanup step below would be a no-op.
+        return None if value[-1] in "0123456789" and is_ipv4_literal(value) else value
+
     value = value.strip().strip("\"'").lower()
     if not value:
         return None
@@ -176,24 +794,27 @@ def normalize_domain(value: str) -> str | None:
     if not value:
         return None
 
-    # Filter out IP literals accidentally parsed as hostnames.
-    try:
-        ipaddress.ip_address(value)
-        return None
-    except ValueError:
-        pass
-
     if not DOMAIN_RE.fullmatch(value):
         return None
+    # IPv6 literals never match DOMAIN_RE, so only dotted quads need filtering.
+    if value[-1] in "0123456789" and is_ipv4_literal(value):
+        return None
     return value
 
 
-def rule_sort_key(rule: str) -> tuple[int, str]:
-    if "," in rule:
-        rule_type, payload = rule.split(",", 1)
-    else:
-        rule_type, payload = rule, ""
-    return RULE_ORDER.get(rule_type, 99), payload
+def is_ipv4_literal(value: str) -> bool:
+    # Same acceptance rules as ipaddress.IPv4Address, without raising on misses.
+    octets = value.split(".")
+    if len(octets) != 4:
+        return False
+    for octet in octets:
+        if not octet or len(octet) > 3 or not octet.isascii() or not octet.isdigit():
+            return False
+        if octet[0] == "0" and len(octet) > 1:
+            return False
+        if int(octet) > 255:
+            return False
+    return True
 
 
 def format_ip_rule(network: ipaddress._BaseNetwork) -> str:
@@ -257,11 +878,12 @@ def parse_domain_or_ip_token(line: str) -> str | None:
         domain = normalize_domain(host_match.group(1))
         return f"DOMAIN,{domain}" if domain else None
 
-    try:
-        network = ipaddress.ip_network(line, strict=False)
-        return format_ip_rule(network)
-    except ValueError:
-        pass
+    if IP_NETWORK_CHARS_RE.fullmatch(line) or "%" in line:
+        try:
+            network = ipaddress.ip_network(line, strict=False)
+            return format_ip_rule(network)
+        except ValueError:
+            pass
 
     domain = normalize_domain(line)
     return f"DOMAIN-SUFFIX,{domain}" if domain else None
@@ -296,122 +918,299 @@ def parse_local_domain_text(text: str) -> set[str]:
     return rules
 
 
+def cidr_token(value: str) -> str:
+    # Explicit "IP-CIDR,<net>[,options]" lines contribute their network column.
+    if value.startswith(("IP-CIDR,", "IP-CIDR6,")):
+        return value.split(",", 2)[1].strip()
+    return value
+
+
 def parse_plain_cidr_text(text: str) -> set[str]:
-    rules: set[str] = set()
+    tokens: list[str] = []
     for raw in text.splitlines():
         line = strip_comment(raw)
-        if not line:
-            continue
+        if line:
+            tokens.append(cidr_token(line))
+    return collapse_cidr_tokens(tokens)
 
-        explicit = parse_explicit_rule(line)
-        if explicit and explicit.startswith(("IP-CIDR,", "IP-CIDR6,")):
-            rules.add(explicit)
-            continue
 
+def parse_cidr_ranges(tokens: Iterable[str]) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """
+    Parse CIDR / address tokens into inclusive (first, last) integer ranges.
+
+    Accepts exactly what ipaddress.ip_network(token, strict=False) accepts and
+    returns IPv4 and IPv6 ranges separately; invalid tokens are dropped.
+    Canonical IPv4 tokens and anything inet_pton() reads as IPv6 (which never
+    disagrees with ipaddress) skip the ipaddress objects entirely.
+    """
+    ipv4: list[tuple[int, int]] = []
+    ipv6: list[tuple[int, int]] = []
+    for token in tokens:
+        match = IPV4_CIDR_RE.fullmatch(token)
+        if match:
+            a, b, c, d, prefix = match.groups()
+            host_bits = 32 - int(prefix) if prefix else 0
+            first = ((int(a) << 24) | (int(b) << 16) | (int(c) << 8) | int(d)) >> host_bits << host_bits
+            ipv4.append((first, first | ((1 << host_bits) - 1)))
+            continue
+        address, slash, prefix = token.partition("/")
+        if ":" in address and (not slash or (prefix.isascii() and prefix.isdigit() and int(prefix) <= 128)):
+            try:
+                packed = socket.inet_pton(socket.AF_INET6, address)
+            except (OSError, ValueError):
+                pass
+            else:
+                host_bits = 128 - int(prefix) if slash else 0
+                first = int.from_bytes(packed, "big") >> host_bits << host_bits
+                ipv6.append((first, first | ((1 << host_bits) - 1)))
+                continue
         try:
-            network = ipaddress.ip_network(line, strict=False)
+            network = ipaddress.ip_network(token, strict=False)
         except ValueError:
             continue
-        rules.add(format_ip_rule(network))
-    return rules
+        ranges = ipv4 if network.version == 4 else ipv6
+        ranges.append((int(network.network_address), int(network.broadcast_address)))
+    return ipv4, ipv6
+
+
+def merge_cidr_ranges(ranges: list[tuple[int, int]], bits: int) -> list[tuple[int, int]]:
+    # Sorted, disjoint and non-adjacent output.
+    if np is not None and len(ranges) >= CIDR_NUMPY_MIN_RANGES:
+        return merge_cidr_ranges_numpy(ranges, bits)
+    merged: list[list[int]] = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1][1] = last
+        else:
+            merged.append([first, last])
+    return [(first, last) for first, last in merged]
 
 
-def collapse_ip_networks(networks: list[ipaddress.IPv4Network | ipaddress.IPv6Network]) -> set[str]:
-    rules: set[str] = set()
-    ipv4: list[ipaddress.IPv4Network] = []
-    ipv6: list[ipaddress.IPv6Network] = []
+def merge_cidr_ranges_numpy(ranges: list[tuple[int, int]], bits: int) -> list[tuple[int, int]]:
+    """
+    NumPy version of merge_cidr_ranges on half-open [first, last + 1) ranges.
+
+    IPv4 values fit int64 as they are. IPv6 values are split into (high, low)
+    uint64 halves and replaced by their rank among all endpoints, which keeps
+    the order (and equal ends and starts equal, so adjacent ranges merge). An
+    end of 2**128 does not fit, so it is clamped and restored afterwards.
+    """
+    top = 1 << bits
+    reaches_top = False
+    if bits == 32:
+        bounds = np.array(ranges, dtype=np.int64)
+        starts = bounds[:, 0]
+        stops = bounds[:, 1] + 1
+    else:
+        mask = (1 << 64) - 1
+        high: list[int] = []
+        low: list[int] = []
+        stop_high: list[int] = []
+        stop_low: list[int] = []
+        for first, last in ranges:
+            stop = last + 1
+            if stop == top:
+                reaches_top = True
+                stop -= 1
+            high.append(first >> 64)
+            low.append(first & mask)
+            stop_high.append(stop >> 64)
+            stop_low.append(stop & mask)
+        endpoint_high = np.array(high + stop_high, dtype=np.uint64)
+        endpoint_low = np.array(low + stop_low, dtype=np.uint64)
+        order = np.lexsort((endpoint_low, endpoint_high))
+        sorted_high = endpoint_high[order]
+        sorted_low = endpoint_low[order]
+        distinct = np.ones(len(order), dtype=bool)
+        distinct[1:] = (sorted_high[1:] != sorted_high[:-1]) | (sorted_low[1:] != sorted_low[:-1])
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.cumsum(distinct) - 1
+        value_high = sorted_high[distinct].tolist()
+        value_low = sorted_low[distinct].tolist()
+        starts = ranks[: len(ranges)]
+        stops = ranks[len(ranges) :]
+
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    reach = np.maximum.accumulate(stops[order])
+    opens = np.ones(len(starts), dtype=bool)
+    opens[1:] = starts[1:] > reach[:-1]
+    first_index = np.flatnonzero(opens)
+    last_index = np.append(first_index[1:] - 1, len(starts) - 1)
+    merged_starts = starts[first_index].tolist()
+    merged_stops = reach[last_index].tolist()
+
+    if bits != 32:
+        merged_starts = [(value_high[rank] << 64) | value_low[rank] for rank in merged_starts]
+        merged_stops = [(value_high[rank] << 64) | value_low[rank] for rank in merged_stops]
+    merged = [(first, stop - 1) for first, stop in zip(merged_starts, merged_stops)]
+    if reaches_top:
+        merged[-1] = (merged[-1][0], top - 1)
+    return merged
+
+
+def subtract_cidr_ranges(ranges: list[tuple[int, int]], removed: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    # Both inputs must be merged (see merge_cidr_ranges).
+    result: list[tuple[int, int]] = []
+    index = 0
+    for first, last in ranges:
+        while index < len(removed) and removed[index][1] < first:
+            index += 1
+        cursor = first
+        probe = index
+        while probe < len(removed) and removed[probe][0] <= last:
+            cut_first, cut_last = removed[probe]
+            if cut_first > cursor:
+                result.append((cursor, cut_first - 1))
+            cursor = max(cursor, cut_last + 1)
+            probe += 1
+        if cursor <= last:
+            result.append((cursor, last))
+    return result
+
+
+def cidr_ranges_to_networks(ranges: list[tuple[int, int]], bits: int) -> list[tuple[int, int]]:
+    # Fewest aligned (address, prefixlen) blocks per range, like summarize_address_range.
+    networks: list[tuple[int, int]] = []
+    for first, last in ranges:
+        while first <= last:
+            aligned = (first & -first).bit_length() - 1 if first else bits
+            step = min(aligned, (last - first + 1).bit_length() - 1)
+            networks.append((first, bits - step))
+            first += 1 << step
+    return networks
+
+
+def format_cidr_rule(address: int, prefixlen: int, bits: int) -> str:
+    if bits == 32:
+        return (
+            f"IP-CIDR,{address >> 24}.{address >> 16 & 255}.{address >> 8 & 255}.{address & 255}"
+            f"/{prefixlen},no-resolve"
+        )
+    if address >> 48:
+        # inet_ntop matches ipaddress' text form except for the IPv4-embedding ranges below 2**48.
+        text = socket.inet_ntop(socket.AF_INET6, address.to_bytes(16, "big"))
+    else:
+        text = str(ipaddress.IPv6Address(address))
+    return f"IP-CIDR6,{text}/{prefixlen},no-resolve"
 
-    for network in networks:
-        if isinstance(network, ipaddress.IPv4Network):
-            ipv4.append(network)
-        else:
-            ipv6.append(network)
 
-    for network in ipaddress.collapse_addresses(ipv4):
-        rules.add(format_ip_rule(network))
-    for network in ipaddress.collapse_addresses(ipv6):
-        rules.add(format_ip_rule(network))
+def collapse_cidr_ranges(ipv4: list[tuple[int, int]], ipv6: list[tuple[int, int]]) -> set[str]:
+    rules: set[str] = set()
+    for ranges, bits in ((ipv4, 32), (ipv6, 128)):
+        for address, prefixlen in cidr_ranges_to_networks(merge_cidr_ranges(ranges, bits), bits):
+            rules.add(format_cidr_rule(address, prefixlen, bits))
     return rules
 
 
+def collapse_cidr_tokens(tokens: Iterable[str]) -> set[str]:
+    return collapse_cidr_ranges(*parse_cidr_ranges(tokens))
+
+
+def ip_rule_tokens(rules: Iterable[str]) -> list[str]:
+    # "IP-CIDR,1.2.3.0/24,no-resolve" -> "1.2.3.0/24"; non-IP rules are skipped.
+    return [rule.split(",", 2)[1].strip() for rule in rules if rule.startswith(("IP-CIDR,", "IP-CIDR6,"))]
+
+
 def parse_cidr_csv_first_column(text: str) -> set[str]:
-    rules: set[str] = set()
-    networks: list[ipaddress.IPv4Network | ipaddress.IPv6Network] = []
+    tokens: list[str] = []
     for raw in text.splitlines():
         line = raw.strip()
         if not line:
             continue
 
         token = line.split(",", 1)[0].strip()
-        if not token:
-            continue
+        if token:
+            tokens.append(token)
+    return collapse_cidr_tokens(tokens)
 
-        explicit = parse_explicit_rule(token)
-        if explicit and explicit.startswith(("IP-CIDR,", "IP-CIDR6,")):
-            rules.add(explicit)
-            continue
 
+def parse_adblock_text(text: str) -> set[str]:
+    rules: set[str] = set()
+    for raw in text.splitlines():
+        parsed = parse_adblock_line(raw)
+        if parsed:
+            rules.add(parsed)
+    return rules
+
+
+def parse_adblock_line(raw: str) -> str | None:
+    line = raw.strip()
+    if not line:
+        return None
+    if line.startswith(("!", "[", "#", ";")):
+        return None
+    if line.startswith("@@"):
+        return None
+    if "##" in line or "#@#" in line or "#?#" in line:
+        return None
+
+    line = line.split("$", 1)[0].strip()
+    if not line:
+        return None
+
+    explicit = parse_explicit_rule(line)
+    if explicit:
+        return explicit
+
+    if line.startswith(("|http://", "|https://")):
+        url = line.lstrip("|")
         try:
-            network = ipaddress.ip_network(token, strict=False)
+            hostname = urllib.parse.urlparse(url).hostname or ""
         except ValueError:
-            continue
-        if isinstance(network, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
-            networks.append(network)
-
-    rules.update(collapse_ip_networks(networks))
-    return rules
+            hostname = ""
+        domain = normalize_domain(hostname)
+        return f"DOMAIN,{domain}" if domain else None
 
+    if line.startswith("||"):
+        token = line[2:].split("^", 1)[0].split("/", 1)[0]
+        domain = normalize_domain(token)
+        return f"DOMAIN-SUFFIX,{domain}" if domain else None
 
-def parse_adblock_text(text: str) -> set[str]:
-    rules: set[str] = set()
-    for raw in text.splitlines():
-        line = raw.strip()
-        if not line:
-            continue
-        if line.startswith(("!", "[", "#", ";")):
-            continue
-        if line.startswith("@@"):
-            continue
-        if "##" in line or "#@#" in line or "#?#" in line:
-            continue
+    host_match = HOST_LINE_RE.match(line)
+    if host_match:
+        domain = normalize_domain(host_match.group(1))
+        return f"DOMAIN,{domain}" if domain else None
 
-        line = line.split("$", 1)[0].strip()
-        if not line:
-            continue
+    return parse_domain_or_ip_token(line)
 
-        explicit = parse_explicit_rule(line)
-        if explicit:
-            rules.add(explicit)
-            continue
 
-        if line.startswith(("|http://", "|https://")):
-            url = line.lstrip("|")
-            try:
-                hostname = urllib.parse.urlparse(url).hostname or ""
-            except ValueError:
-                hostname = ""
-            domain = normalize_domain(hostname)
-            if domain:
-                rules.add(f"DOMAIN,{domain}")
-            continue
+def parse_adblock_buffer(text: str) -> set[str]:
+    """
+    Whole-buffer equivalent of parse_adblock_text.
 
-        if line.startswith("||"):
-            token = line[2:].split("^", 1)[0].split("/", 1)[0]
-            domain = normalize_domain(token)
-            if domain:
-                rules.add(f"DOMAIN-SUFFIX,{domain}")
-            continue
+    ADBLOCK_LINE_RE classifies every line in one finditer pass: comments,
+    cosmetic and exception lines are dropped, the common `||host^`, hosts and
+    bare-hostname shapes go straight to normalize_domains, and anything else
+    takes the per-line path, so the rule set is identical.
+    """
+    if LINE_BREAK_RE.search(text):
+        # Match str.splitlines() exactly; the line regex only splits on \n.
+        text = "\n".join(text.splitlines())
 
-        host_match = HOST_LINE_RE.match(line)
-        if host_match:
-            domain = normalize_domain(host_match.group(1))
-            if domain:
-                rules.add(f"DOMAIN,{domain}")
+    rules: set[str] = set()
+    suffix_tokens: list[str] = []
+    host_tokens: list[str] = []
+    for match in ADBLOCK_LINE_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "skip" or kind == "cosmetic":
             continue
-
-        parsed = parse_domain_or_ip_token(line)
-        if parsed:
-            rules.add(parsed)
+        if kind == "suffix" or kind == "bare":
+            suffix_tokens.append(match.group(kind))
+        elif kind == "host" or kind == "url":
+            host_tokens.append(match.group(kind))
+        else:
+            parsed = parse_adblock_line(match.group("other"))
+            if parsed:
+                rules.add(parsed)
+
+    for domain in normalize_domains(suffix_tokens):
+        if domain:
+            rules.add(f"DOMAIN-SUFFIX,{domain}")
+    for domain in normalize_domains(host_tokens):
+        if domain:
+            rules.add(f"DOMAIN,{domain}")
     return rules
 
 
@@ -419,9 +1218,16 @@ def parse_telegram_cidr_text(text: str) -> set[str]:
     return parse_plain_cidr_text(text)
 
 
-def parse_apnic_country_cidr(text: str, country: str) -> set[str]:
-    rules: set[str] = set()
-    cc = country.upper()
+def build_apnic_index(text: str) -> dict[str, tuple[list[tuple[int, int]], list[tuple[int, int]]]]:
+    """
+    Index a delegated-apnic file in one pass: country -> merged (IPv4, IPv6) ranges.
+
+    Only allocated / assigned records are kept. Records that ipaddress would
+    reject (bad start address, or a count running past 255.255.255.255) are
+    skipped.
+    """
+    ipv4: dict[str, list[tuple[int, int]]] = defaultdict(list)
+    ipv6_tokens: dict[str, list[str]] = defaultdict(list)
 
     for raw in text.splitlines():
         line = raw.strip()
@@ -431,43 +1237,46 @@ def parse_apnic_country_cidr(text: str, country: str) -> set[str]:
         if len(parts) < 7:
             continue
         _, rec_cc, rec_type, start, value, _, status = parts[:7]
-        if rec_cc.upper() != cc:
-            continue
         if status not in {"allocated", "assigned"}:
             continue
 
         if rec_type == "ipv4":
+            match = IPV4_CIDR_RE.fullmatch(start)
+            if not match or match.group(5) is not None:
+                continue
             try:
                 count = int(value)
-                start_ip = ipaddress.IPv4Address(start)
-                end_ip = ipaddress.IPv4Address(int(start_ip) + count - 1)
-            except (ValueError, ipaddress.AddressValueError):
+            except ValueError:
                 continue
-            for net in ipaddress.summarize_address_range(start_ip, end_ip):
-                rules.add(format_ip_rule(net))
+            a, b, c, d = (int(octet) for octet in match.groups()[:4])
+            first = (a << 24) | (b << 16) | (c << 8) | d
+            if count > 0 and first + count <= 1 << 32:
+                ipv4[rec_cc.upper()].append((first, first + count - 1))
             continue
 
         if rec_type == "ipv6":
             try:
                 prefix_len = int(value)
-                net = ipaddress.IPv6Network(f"{start}/{prefix_len}", strict=False)
             except ValueError:
                 continue
-            rules.add(format_ip_rule(net))
+            ipv6_tokens[rec_cc.upper()].append(f"{start}/{prefix_len}")
 
-    return rules
+    return {
+        cc: (merge_cidr_ranges(ipv4.get(cc, []), 32), merge_cidr_ranges(parse_cidr_ranges(ipv6_tokens.get(cc, []))[1], 128))
+        for cc in sorted(set(ipv4) | set(ipv6_tokens))
+    }
 
 
 def parse_iana_special_csv(text: str) -> set[str]:
-    rules: set[str] = set()
+    tokens: list[str] = []
     reader = csv.DictReader(text.splitlines())
     if not reader.fieldnames:
-        return rules
+        return set()
 
     address_key = next((f for f in reader.fieldnames if "Address Block" in f), None)
     reachable_key = next((f for f in reader.fieldnames if "Globally Reachable" in f), None)
     if not address_key:
-        return rules
+        return set()
 
     for row in reader:
         if reachable_key:
@@ -482,18 +1291,13 @@ def parse_iana_special_csv(text: str) -> set[str]:
         block_candidates = [b.strip() for b in block_text.split(",") if b.strip()]
         for block in block_candidates:
             block = FOOTNOTE_RE.sub("", block).strip()
-            if not block:
-                continue
-            try:
-                network = ipaddress.ip_network(block, strict=False)
-            except ValueError:
-                continue
-            rules.add(format_ip_rule(network))
-    return rules
+            if block:
+                tokens.append(block)
+    return collapse_cidr_tokens(tokens)
 
 
 def parse_aws_ip_ranges(data: bytes, services: list[str]) -> set[str]:
-    rules: set[str] = set()
+    tokens: list[str] = []
     payload = json.loads(data.decode("utf-8"))
     service_set = {s.upper() for s in services}
 
@@ -502,41 +1306,29 @@ def parse_aws_ip_ranges(data: bytes, services: list[str]) -> set[str]:
         if service_set and service not in service_set:
             continue
         prefix = item.get("ip_prefix")
-        if not prefix:
-            continue
-        try:
-            rules.add(format_ip_rule(ipaddress.ip_network(prefix, strict=False)))
-        except ValueError:
-            continue
+        if prefix:
+            tokens.append(str(prefix))
 
     for item in payload.get("ipv6_prefixes", []):
         service = str(item.get("service", "")).upper()
         if service_set and service not in service_set:
             continue
         prefix = item.get("ipv6_prefix")
-        if not prefix:
-            continue
-        try:
-            rules.add(format_ip_rule(ipaddress.ip_network(prefix, strict=False)))
-        except ValueError:
-            continue
+        if prefix:
+            tokens.append(str(prefix))
 
-    return rules
+    return collapse_cidr_tokens(tokens)
 
 
 def parse_gcp_ip_ranges(data: bytes) -> set[str]:
-    rules: set[str] = set()
+    tokens: list[str] = []
     payload = json.loads(data.decode("utf-8"))
     for item in payload.get("prefixes", []):
         for key in ("ipv4Prefix", "ipv6Prefix"):
             prefix = item.get(key)
-            if not prefix:
-                continue
-            try:
-                rules.add(format_ip_rule(ipaddress.ip_network(prefix, strict=False)))
-            except ValueError:
-                continue
-    return rules
+            if prefix:
+                tokens.append(str(prefix))
+    return collapse_cidr_tokens(tokens)
 
 
 def parse_iana_tld_list_text(text: str, exclude_tlds: set[str]) -> set[str]:
@@ -644,83 +1436,508 @@ def parse_v2fly_dlc_source(
     exclude_attrs: set[str],
     exclude_includes: set[str],
 ) -> tuple[set[str], bool]:
-    visited: set[str] = set()
-    rules: set[str] = set()
-    used_cache_only = True
-
-    def walk(current_url: str) -> set[str]:
-        nonlocal used_cache_only
-        if current_url in visited:
-            return set()
-        visited.add(current_url)
+    """
+    Resolve a v2fly list and everything it includes.
 
-        data, used_cache = fetch_bytes(current_url, cache_dir, offline=offline)
-        used_cache_only = used_cache_only and used_cache
+    The resolved rule set of each file is memoized in V2FLY_SUBTREE_MEMO per
+    (url, include_attrs, exclude_attrs, exclude_includes), so lists pulled in
+    by several categories are parsed once per build. Include cycles are
+    handled as strongly connected components (Tarjan): every file of a cycle
+    resolves to the same rule set, and only complete sets are memoized.
+    """
+    options = (frozenset(include_attrs), frozenset(exclude_attrs), frozenset(exclude_includes))
+    index: dict[str, int] = {}
+    lowlink: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    partial: dict[str, tuple[set[str], bool]] = {}
+
+    def walk(current_url: str) -> tuple[frozenset[str] | set[str], bool]:
+        memo_key = (current_url, *options)
+        cached = V2FLY_SUBTREE_MEMO.get(memo_key)
+        with FETCH_LOCK:
+            V2FLY_SUBTREE_STATS["hits" if cached is not None else "misses"] += 1
+        if cached is not None:
+            return cached
+
+        index[current_url] = lowlink[current_url] = len(index)
+        stack.append(current_url)
+        on_stack.add(current_url)
+
+        archived = V2FLY_ARCHIVE.read(current_url)
+        if archived is not None:
+            data, used_cache = archived, V2FLY_ARCHIVE.used_cache
+        else:
+            data, used_cache = fetch_bytes(current_url, cache_dir, offline=offline)
         text = decode_text(data)
         base_url = current_url.rsplit("/", 1)[0]
+        used_cache_only = used_cache
 
-        def include_handler(include_name: str) -> set[str]:
+        def include_handler(include_name: str) -> frozenset[str] | set[str]:
+            nonlocal used_cache_only
             if include_name in exclude_includes:
                 return set()
             include_url = f"{base_url}/{include_name}"
-            return walk(include_url)
-
-        return parse_v2fly_dlc_text(
+            with FETCH_LOCK:
+                V2FLY_INCLUDES.setdefault(current_url, set()).add(include_url)
+            if include_url in on_stack:
+                # Back edge of an include cycle; merged when the cycle closes.
+                lowlink[current_url] = min(lowlink[current_url], index[include_url])
+                return set()
+            if include_url in index:
+                # Already resolved in this walk, so its cycle has been memoized.
+                child_rules, child_cache = V2FLY_SUBTREE_MEMO[(include_url, *options)]
+            else:
+                child_rules, child_cache = walk(include_url)
+                lowlink[current_url] = min(lowlink[current_url], lowlink.get(include_url, index[current_url]))
+            used_cache_only = used_cache_only and child_cache
+            return child_rules
+
+        rules = parse_v2fly_dlc_text(
             text,
             include_attrs=include_attrs,
             exclude_attrs=exclude_attrs,
             include_handler=include_handler,
         )
+        partial[current_url] = (rules, used_cache_only)
+        if lowlink[current_url] != index[current_url]:
+            return rules, used_cache_only
+
+        members: list[str] = []
+        while True:
+            member = stack.pop()
+            on_stack.discard(member)
+            members.append(member)
+            if member == current_url:
+                break
+        resolved: set[str] = set()
+        resolved_cache = True
+        for member in members:
+            member_rules, member_cache = partial.pop(member)
+            resolved.update(member_rules)
+            resolved_cache = resolved_cache and member_cache
+        frozen = frozenset(resolved)
+        for member in members:
+            V2FLY_SUBTREE_MEMO[(member, *options)] = (frozen, resolved_cache)
+        return frozen, resolved_cache
+
+    rules, used_cache_only = walk(url)
+    return set(rules), used_cache_only
+
+
+def read_cache_meta(meta_file: pathlib.Path) -> dict[str, Any]:
+    if not meta_file.exists():
+        return {}
+    try:
+        payload = json.loads(meta_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
 
-    rules.update(walk(url))
-    return rules, used_cache_only
 
+def write_cache_meta(meta_file: pathlib.Path, payload: dict[str, Any]) -> None:
+    meta_file.write_text(json.dumps(payload), encoding="utf-8")
 
-def fetch_bytes(url: str, cache_dir: pathlib.Path, offline: bool = False) -> tuple[bytes, bool]:
-    memo_hit = FETCH_MEMO.get(url)
-    if memo_hit is not None:
-        return memo_hit
 
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
-    cache_file = cache_dir / f"{digest}.bin"
-    meta_file = cache_dir / f"{digest}.json"
+def accept_encoding_header() -> str:
+    codecs = ["gzip", "deflate"]
+    if brotli is not None:
+        codecs.append("br")
+    if zstandard is not None:
+        codecs.append("zstd")
+    return ", ".join(codecs)
 
-    if offline:
-        if not cache_file.exists():
-            raise BuildError(f"offline mode: no cache for {url}")
-        result = (cache_file.read_bytes(), True)
-        record_fetch_event(url, "offline_cache")
-        FETCH_MEMO[url] = result
-        return result
 
-    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept": "*/*"})
+def decode_content(data: bytes, codec: str) -> bytes:
+    codec = codec.strip().lower()
+    if not codec or codec == "identity":
+        return data
     try:
-        with urllib.request.urlopen(request, timeout=45) as response:
-            data = response.read()
-        if not data:
-            raise BuildError(f"empty response from {url}")
-        cache_file.write_bytes(data)
-        meta_file.write_text(
-            json.dumps({"url": url, "fetched_at_utc": dt.datetime.now(dt.timezone.utc).isoformat()}),
-            encoding="utf-8",
-        )
-        result = (data, False)
-        record_fetch_event(url, "network")
-        FETCH_MEMO[url] = result
-        return result
-    except (urllib.error.URLError, TimeoutError, OSError) as exc:
-        if cache_file.exists():
-            log(f"warning: fetch failed for {url}; using cache ({exc})")
-            result = (cache_file.read_bytes(), True)
-            record_fetch_event(url, "fallback_cache", error=str(exc))
-            FETCH_MEMO[url] = result
-            return result
-        raise BuildError(f"fetch failed for {url}: {exc}") from exc
-
+        if codec in {"gzip", "x-gzip"}:
+            return gzip.decompress(data)
+        if codec == "deflate":
+            try:
+                return zlib.decompress(data)
+            except zlib.error:
+                # Some servers send raw deflate without the zlib header.
+                return zlib.decompress(data, -zlib.MAX_WBITS)
+        if codec == "br" and brotli is not None:
+            return brotli.decompress(data)
+        if codec == "zstd" and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    except Exception as exc:  # zlib, brotli and zstandard each raise their own error types
+        raise BuildError(f"corrupt {codec} content: {exc}") from exc
+    raise BuildError(f"unsupported content encoding: {codec}")
+
+
+def read_cache_body(cache_file: pathlib.Path, cache_meta: dict[str, Any]) -> bytes:
+    data = cache_file.read_bytes()
+    codec = str(cache_meta.get("codec", ""))
+    if not codec and data[:2] == b"\x1f\x8b":
+        # Sidecar lost or written by an older builder; sniff the gzip magic.
+        codec = "gzip"
+    return decode_content(data, codec)
+
+
+def store_cache_body(cache_file: pathlib.Path, wire_data: bytes, wire_codec: str) -> str:
+    # Keep whatever compressed form arrived on the wire; compress identity bodies locally.
+    wire_codec = wire_codec.strip().lower()
+    if wire_codec in {"gzip", "x-gzip", "deflate", "br", "zstd"}:
+        cache_file.write_bytes(wire_data)
+        return wire_codec
+    cache_file.write_bytes(gzip.compress(wire_data, compresslevel=6, mtime=0))
+    return CACHE_CODEC
+
+
+def mark_cache_entry(key: str, files: tuple[str, ...], ref: str) -> None:
+    with FETCH_LOCK:
+        CACHE_USAGE[key] = {"ref": ref, "files": list(files)}
+
+
+def load_cache_index(cache_dir: pathlib.Path) -> dict[str, Any]:
+    index = read_cache_meta(cache_dir / CACHE_INDEX_NAME)
+    if isinstance(index.get("entries"), dict):
+        index.setdefault("build_seq", 0)
+        # Indexes adopted by earlier builds may list the build state as an orphan entry.
+        for key, entry in list(index["entries"].items()):
+            if CACHE_RESERVED_NAMES.intersection(entry.get("files", [])):
+                del index["entries"][key]
+        return index
+
+    # First run (or lost index): adopt existing files once so they age out normally.
+    entries: dict[str, dict[str, Any]] = {}
+    if cache_dir.exists():
+        for path in cache_dir.iterdir():
+            if not path.is_file() or path.name in CACHE_RESERVED_NAMES or path.name.startswith("."):
+                continue
+            entry = entries.setdefault(path.name.split(".", 1)[0], {"ref": "", "files": [], "size": 0})
+            entry["files"].append(path.name)
+            entry["size"] += path.stat().st_size
+    for entry in entries.values():
+        entry["files"].sort()
+        entry["last_used_build"] = 0
+        entry["last_used_utc"] = ""
+    return {"version": 1, "build_seq": 0, "entries": entries}
 
-def collect_source_urls(source: dict[str, Any]) -> list[str]:
-    urls: list[str] = []
+
+def collect_cache_garbage(
+    cache_dir: pathlib.Path,
+    keep_builds: int,
+    max_bytes: int,
+    record_build: bool,
+) -> dict[str, Any]:
+    """
+    Update the cache index with this build's usage and evict stale entries.
+
+    Entries not used in the last `keep_builds` recorded builds are removed
+    first, then least recently used entries until the cache fits `max_bytes`.
+    A value of 0 disables the respective limit.
+    """
+    index = load_cache_index(cache_dir)
+    entries: dict[str, dict[str, Any]] = index["entries"]
+    build_seq = int(index.get("build_seq", 0))
+
+    if record_build:
+        build_seq += 1
+        now = dt.datetime.now(dt.timezone.utc).isoformat()
+        for key, usage in CACHE_USAGE.items():
+            size = 0
+            for name in usage["files"]:
+                path = cache_dir / name
+                if path.exists():
+                    size += path.stat().st_size
+            entries[key] = {
+                "ref": usage["ref"],
+                "files": sorted(usage["files"]),
+                "size": size,
+                "last_used_build": build_seq,
+                "last_used_utc": now,
+            }
+
+    evicted: list[dict[str, Any]] = []
+    if keep_builds > 0:
+        for key in sorted(entries):
+            if build_seq - int(entries[key].get("last_used_build", 0)) >= keep_builds:
+                evicted.append(entries.pop(key))
+
+    total_bytes = sum(int(entry.get("size", 0)) for entry in entries.values())
+    if max_bytes > 0 and total_bytes > max_bytes:
+        lru_order = sorted(
+            entries,
+            key=lambda k: (int(entries[k].get("last_used_build", 0)), str(entries[k].get("last_used_utc", "")), k),
+        )
+        for key in lru_order:
+            if total_bytes <= max_bytes:
+                break
+            if record_build and int(entries[key].get("last_used_build", 0)) == build_seq:
+                log(f"warning: cache still exceeds {max_bytes} bytes with only current-build entries left")
+                break
+            total_bytes -= int(entries[key].get("size", 0))
+            evicted.append(entries.pop(key))
+
+    evicted_bytes = 0
+    for entry in evicted:
+        evicted_bytes += int(entry.get("size", 0))
+        for name in entry.get("files", []):
+            (cache_dir / str(name)).unlink(missing_ok=True)
+
+    index["version"] = 1
+    index["build_seq"] = build_seq
+    index["entries"] = {key: entries[key] for key in sorted(entries)}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    index_file = cache_dir / CACHE_INDEX_NAME
+    tmp_file = index_file.with_name(f".{CACHE_INDEX_NAME}.tmp")
+    tmp_file.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    tmp_file.replace(index_file)
+
+    return {
+        "build_seq": build_seq,
+        "entry_count": len(entries),
+        "total_bytes": total_bytes,
+        "evicted_count": len(evicted),
+        "evicted_bytes": evicted_bytes,
+    }
+
+
+def log_cache_gc(stats: dict[str, Any]) -> None:
+    log(
+        "cache gc: "
+        f"entries={stats['entry_count']} size={stats['total_bytes']} "
+        f"evicted={stats['evicted_count']} evicted_bytes={stats['evicted_bytes']}"
+    )
+
+
+def uses_proxy(url: str) -> bool:
+    proxies = urllib.request.getproxies()
+    if not proxies:
+        return False
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme.lower() not in proxies:
+        return False
+    return not urllib.request.proxy_bypass(parts.hostname or "")
+
+
+def urllib_get(
+    url: str,
+    headers: dict[str, str],
+    timeout: float,
+    on_response: Any = None,
+    cancel: threading.Event | None = None,
+) -> HttpResponse:
+    # Used when an HTTP(S) proxy is configured in the environment; urllib handles it.
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            if on_response is not None:
+                on_response(response.status)
+            return HttpResponse(response.status, response.reason, response.headers, read_body(response, cancel))
+    except urllib.error.HTTPError as exc:
+        if exc.code != 304:
+            raise
+        if on_response is not None:
+            on_response(304)
+        return HttpResponse(304, exc.reason, exc.headers, b"")
+
+
+def http_get(
+    url: str,
+    headers: dict[str, str],
+    timeout: float,
+    on_response: Any = None,
+    cancel: threading.Event | None = None,
+) -> HttpResponse:
+    if uses_proxy(url):
+        return urllib_get(url, headers, timeout, on_response, cancel)
+
+    current = url
+    for _ in range(HTTP_MAX_REDIRECTS + 1):
+        response = HTTP_POOL.request(current, headers, timeout, on_response, cancel)
+        location = response.headers.get("Location", "")
+        if response.status in HTTP_REDIRECT_STATUSES and location:
+            current = urllib.parse.urljoin(current, location)
+            continue
+        if response.status == 304 or 200 <= response.status < 300:
+            return response
+        raise urllib.error.HTTPError(current, response.status, response.reason, response.headers, None)
+    raise urllib.error.URLError(f"too many redirects for {url}")
+
+
+def classify_fetch_error(exc: BaseException) -> tuple[bool, float | None]:
+    """Return (retryable, server-requested delay in seconds) for a failed request."""
+    if isinstance(exc, (CircuitOpenError, FetchAbandoned)):
+        return False, None
+    if isinstance(exc, urllib.error.HTTPError):
+        retry_after: float | None = None
+        raw = (exc.headers.get("Retry-After", "") if exc.headers is not None else "").strip()
+        if raw.isdigit():
+            retry_after = float(raw)
+        return exc.code in HTTP_RETRYABLE_STATUSES, retry_after
+
+    reason: Any = exc.reason if isinstance(exc, urllib.error.URLError) else exc
+    if isinstance(reason, socket.gaierror):
+        # Only a temporary resolver failure is worth retrying; NXDOMAIN is not.
+        return reason.errno == socket.EAI_AGAIN, None
+    if isinstance(reason, ssl.SSLCertVerificationError):
+        return False, None
+    if isinstance(reason, (TimeoutError, ConnectionError, http.client.HTTPException)):
+        return True, None
+    if isinstance(reason, OSError):
+        return reason.errno in RETRYABLE_ERRNOS, None
+    return False, None
+
+
+def retry_delay(attempt: int, retry_after: float | None) -> float:
+    # Exponential backoff with equal jitter; honour a reasonable Retry-After.
+    ceiling = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** (attempt - 1)))
+    delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, RETRY_BACKOFF_MAX))
+    return delay
+
+
+def http_get_with_retry(
+    url: str,
+    headers: dict[str, str],
+    timeout: float,
+    hedge: HedgeSignal | None = None,
+    on_response: Any = None,
+) -> HttpResponse:
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    attempts = max(0, FETCH_SETTINGS.retries) + 1
+    for attempt in range(1, attempts + 1):
+        if not HOST_BREAKER.allow(host):
+            raise CircuitOpenError(f"circuit breaker open for {host}")
+        try:
+            response = http_get(url, headers, timeout, on_response, hedge.abandoned if hedge is not None else None)
+        except (urllib.error.URLError, TimeoutError, OSError) as exc:
+            retryable, retry_after = classify_fetch_error(exc)
+            if not retryable:
+                raise
+            breaker_open = HOST_BREAKER.record_failure(host)
+            if attempt == attempts or breaker_open:
+                raise
+            delay = retry_delay(attempt, retry_after)
+            log(f"warning: fetch attempt {attempt}/{attempts} failed for {url}; retrying in {delay:.1f}s ({exc})")
+            with FETCH_LOCK:
+                FETCH_RETRIES[url] = FETCH_RETRIES.get(url, 0) + 1
+            if hedge is not None:
+                if hedge.abandoned.wait(delay):
+                    raise
+            else:
+                time.sleep(delay)
+            continue
+        HOST_BREAKER.record_success(host)
+        return response
+    raise urllib.error.URLError(f"no fetch attempts made for {url}")
+
+
+def fetch_bytes(
+    url: str,
+    cache_dir: pathlib.Path,
+    offline: bool = False,
+    hedge: HedgeSignal | None = None,
+) -> tuple[bytes, bool]:
+    memo_hit = FETCH_MEMO.get(url)
+    if memo_hit is not None:
+        return memo_hit
+    failure = FETCH_FAILURES.get(url)
+    if failure is not None:
+        raise BuildError(failure)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+    cache_file = cache_dir / f"{digest}.bin"
+    meta_file = cache_dir / f"{digest}.json"
+
+    if offline:
+        if not cache_file.exists():
+            raise BuildError(f"offline mode: no cache for {url}")
+        result = (read_cache_body(cache_file, read_cache_meta(meta_file)), True)
+        record_fetch_event(url, "offline_cache")
+        mark_cache_entry(digest, (cache_file.name, meta_file.name), url)
+        FETCH_MEMO[url] = result
+        return result
+
+    headers = {"User-Agent": USER_AGENT, "Accept": "*/*", "Accept-Encoding": accept_encoding_header()}
+    cache_meta = read_cache_meta(meta_file) if cache_file.exists() else {}
+    if cache_meta.get("etag"):
+        headers["If-None-Match"] = str(cache_meta["etag"])
+    if cache_meta.get("last_modified"):
+        headers["If-Modified-Since"] = str(cache_meta["last_modified"])
+
+    def mark_answered(status: int) -> None:
+        # An error status is not an answer worth waiting for; let the hedge race on.
+        if hedge is not None and (status == 304 or 200 <= status < 300):
+            hedge.answered.set()
+
+    started = time.monotonic()
+    try:
+        response = http_get_with_retry(url, headers, FETCH_TIMEOUT, hedge=hedge, on_response=mark_answered)
+        if response.status == 304:
+            if not cache_meta:
+                raise urllib.error.HTTPError(url, 304, "not modified without a cached body", response.headers, None)
+            # Upstream confirmed the cached body is current.
+            if hedge is not None and not hedge.claim():
+                raise BuildError(f"{url}: a faster mirror answered first")
+            data = read_cache_body(cache_file, cache_meta)
+            record_fetch_timing(url, started, len(data))
+            cache_meta["validated_at_utc"] = dt.datetime.now(dt.timezone.utc).isoformat()
+            write_cache_meta(meta_file, cache_meta)
+            result = (data, False)
+            record_fetch_event(url, "not_modified")
+            mark_cache_entry(digest, (cache_file.name, meta_file.name), url)
+            FETCH_MEMO[url] = result
+            return result
+        wire_data = response.body
+        wire_codec = response.headers.get("Content-Encoding", "")
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+        data = decode_content(wire_data, wire_codec)
+        if not data:
+            raise BuildError(f"empty response from {url}")
+        if hedge is not None and not hedge.claim():
+            # A faster mirror already won; keep the cache, report and memo about the winner only.
+            raise BuildError(f"{url}: a faster mirror answered first")
+        record_fetch_timing(url, started, len(data), len(wire_data))
+        codec = store_cache_body(cache_file, wire_data, wire_codec)
+        fetched_at = dt.datetime.now(dt.timezone.utc).isoformat()
+        meta: dict[str, Any] = {
+            "url": url,
+            "fetched_at_utc": fetched_at,
+            "validated_at_utc": fetched_at,
+            "codec": codec,
+            "size": len(data),
+        }
+        if etag:
+            meta["etag"] = etag
+        if last_modified:
+            meta["last_modified"] = last_modified
+        write_cache_meta(meta_file, meta)
+        result = (data, False)
+        record_fetch_event(url, "network")
+        mark_cache_entry(digest, (cache_file.name, meta_file.name), url)
+        FETCH_MEMO[url] = result
+        return result
+    except (urllib.error.URLError, TimeoutError, OSError) as exc:
+        if hedge is not None and hedge.abandoned.is_set():
+            raise BuildError(f"fetch failed for {url} after a faster mirror answered: {exc}") from exc
+        if cache_file.exists():
+            if hedge is not None and not hedge.claim():
+                raise BuildError(f"{url}: a faster mirror answered first") from exc
+            log(f"warning: fetch failed for {url}; using cache ({exc})")
+            result = (read_cache_body(cache_file, read_cache_meta(meta_file)), True)
+            record_fetch_timing(url, started, len(result[0]))
+            record_fetch_event(url, "fallback_cache", error=str(exc))
+            mark_cache_entry(digest, (cache_file.name, meta_file.name), url)
+            FETCH_MEMO[url] = result
+            return result
+        # Remember the failure so the build does not wait on the same timeout twice.
+        FETCH_FAILURES[url] = f"fetch failed for {url}: {exc}"
+        raise BuildError(FETCH_FAILURES[url]) from exc
+
+
+def collect_source_urls(source: dict[str, Any]) -> list[str]:
+    urls: list[str] = []
 
     primary_url = str(source.get("url", "")).strip()
     if primary_url:
@@ -754,22 +1971,306 @@ def collect_source_urls(source: dict[str, Any]) -> list[str]:
     return deduped
 
 
+def fetch_hedged(candidates: tuple[str, ...], cache_dir: pathlib.Path) -> tuple[bytes, bool, str]:
+    """
+    Race mirror URLs instead of waiting for each one to time out.
+
+    The next candidate is launched when the newest request has not received
+    response headers within the hedge delay, or as soon as every running
+    request has failed. The first request to claim a non-empty body wins
+    (HedgeSignal.claim); the others stop reading at their next chunk and are
+    neither memoized, cached nor reported.
+    """
+    delay = FETCH_SETTINGS.hedge_delay
+    results: queue.SimpleQueue[tuple[int, bytes | None, bool, str]] = queue.SimpleQueue()
+    abandoned = threading.Event()
+    signals: list[HedgeSignal] = []
+    launched_at: list[float] = []
+    race: dict[str, Any] = {"candidates": candidates, "started": time.monotonic(), "outcomes": {}}
+
+    def run(idx: int) -> None:
+        try:
+            data, used_cache = fetch_bytes(candidates[idx], cache_dir, hedge=signals[idx])
+            outcome: tuple[int, bytes | None, bool, str] = (idx, data, used_cache, "")
+        except BuildError as exc:
+            outcome = (idx, None, False, str(exc))
+        with FETCH_LOCK:
+            race["outcomes"][idx] = {
+                "elapsed_ms": (time.monotonic() - launched_at[idx]) * 1000.0,
+                "ok": outcome[1] is not None,
+            }
+        results.put(outcome)
+
+    def launch() -> None:
+        idx = len(signals)
+        signals.append(HedgeSignal(abandoned=abandoned, answered=threading.Event()))
+        launched_at.append(time.monotonic())
+        # Daemon threads: an abandoned request must not hold up interpreter exit.
+        threading.Thread(target=run, args=(idx,), name=f"hedge-{idx}", daemon=True).start()
+
+    launch()
+    running = 1
+    errors: list[str] = []
+    while True:
+        timeout = None
+        if len(signals) < len(candidates) and not signals[-1].answered.is_set():
+            timeout = max(0.0, delay - (time.monotonic() - launched_at[-1]))
+        try:
+            idx, data, used_cache, error = results.get(timeout=timeout)
+        except queue.Empty:
+            if not signals[-1].answered.is_set():
+                log(
+                    f"hedging: no answer from {candidates[len(signals) - 1]} after {delay:.1f}s, "
+                    f"racing {candidates[len(signals)]}"
+                )
+                launch()
+                running += 1
+            continue
+
+        running -= 1
+        if data:
+            abandoned.set()
+            race["winner_index"] = idx
+            race["launched"] = len(signals)
+            race["elapsed_ms"] = (time.monotonic() - race["started"]) * 1000.0
+            if len(signals) > 1:
+                with FETCH_LOCK:
+                    FETCH_RACES.append(race)
+            return data, used_cache, candidates[idx]
+
+        errors.append(f"{candidates[idx]}: {error or 'empty response'}")
+        if running == 0:
+            if len(signals) == len(candidates):
+                raise BuildError("all source URLs failed; " + " | ".join(errors))
+            launch()
+            running += 1
+
+
+def fetch_candidates(candidates: tuple[str, ...], cache_dir: pathlib.Path, offline: bool) -> tuple[bytes, bool, str]:
+    winner = FETCH_WINNERS.get(candidates)
+    if winner is not None:
+        data, used_cache = fetch_bytes(winner, cache_dir, offline=offline)
+        return data, used_cache, winner
+
+    if not offline and FETCH_SETTINGS.hedge_delay > 0 and len(candidates) > 1:
+        data, used_cache, winner = fetch_hedged(candidates, cache_dir)
+    else:
+        errors: list[str] = []
+        for candidate in candidates:
+            try:
+                data, used_cache = fetch_bytes(candidate, cache_dir, offline=offline)
+            except BuildError as exc:
+                errors.append(f"{candidate}: {exc}")
+                continue
+            winner = candidate
+            break
+        else:
+            raise BuildError("all source URLs failed; " + " | ".join(errors))
+
+    if winner != candidates[0]:
+        log(f"using fallback source URL: {winner}")
+    FETCH_WINNERS[candidates] = winner
+    return data, used_cache, winner
+
+
 def fetch_source_bytes(source: dict[str, Any], cache_dir: pathlib.Path, offline: bool) -> tuple[bytes, bool, str]:
     candidates = collect_source_urls(source)
     if not candidates:
         raise BuildError("source requires at least one URL (url / urls / fallback_urls)")
+    return fetch_candidates(tuple(candidates), cache_dir, offline)
 
-    errors: list[str] = []
-    for idx, candidate in enumerate(candidates):
-        try:
-            data, used_cache = fetch_bytes(candidate, cache_dir, offline=offline)
-            if idx > 0:
-                log(f"using fallback source URL: {candidate}")
-            return data, used_cache, candidate
-        except BuildError as exc:
-            errors.append(f"{candidate}: {exc}")
 
-    raise BuildError("all source URLs failed; " + " | ".join(errors))
+def v2fly_archive_member_name(path: str) -> str:
+    # GitHub archives nest everything under "<repo>-<ref>/"; plain dumps of
+    # the data directory start at "data/".
+    parts = path.strip("/").split("/")
+    if len(parts) in (2, 3) and parts[-2] == "data" and parts[-1]:
+        return parts[-1]
+    return ""
+
+
+def extract_v2fly_archive(data: bytes) -> dict[str, bytes]:
+    files: dict[str, bytes] = {}
+    try:
+        if data[:4] == b"PK\x03\x04":
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for info in archive.infolist():
+                    name = v2fly_archive_member_name(info.filename)
+                    if name and not info.is_dir():
+                        files[name] = archive.read(info)
+        else:
+            with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+                for member in archive:
+                    name = v2fly_archive_member_name(member.name)
+                    if not name or not member.isfile():
+                        continue
+                    handle = archive.extractfile(member)
+                    if handle is not None:
+                        files[name] = handle.read()
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as exc:
+        raise BuildError(f"unreadable v2fly archive: {exc}") from exc
+    if not files:
+        raise BuildError("v2fly archive has no data/ entries")
+    return files
+
+
+def load_v2fly_archive(config: dict[str, Any], cache_dir: pathlib.Path, offline: bool) -> None:
+    """
+    Download the whole domain-list-community data/ directory in one request.
+
+    v2fly_dlc sources and their includes whose URLs start with one of
+    `url_prefixes` are then served from memory. If the archive cannot be
+    fetched, those URLs fall back to the usual per-file fetches.
+    """
+    V2FLY_ARCHIVE.reset()
+    raw = config.get("v2fly_archive")
+    if not raw:
+        return
+    if not isinstance(raw, dict):
+        raise BuildError("config field 'v2fly_archive' must be an object")
+    raw_prefixes = raw.get("url_prefixes", [])
+    if not isinstance(raw_prefixes, list):
+        raise BuildError("v2fly_archive field 'url_prefixes' must be an array")
+    prefixes = tuple(
+        prefix if prefix.endswith("/") else f"{prefix}/"
+        for prefix in (str(item).strip() for item in raw_prefixes)
+        if prefix
+    )
+    candidates = collect_source_urls(raw)
+    if not candidates or not prefixes:
+        raise BuildError("v2fly_archive requires at least one URL and one entry in 'url_prefixes'")
+    V2FLY_ARCHIVE.reset(prefixes)
+
+    try:
+        data, used_cache, winner = fetch_candidates(tuple(candidates), cache_dir, offline)
+        files = extract_v2fly_archive(data)
+    except BuildError as exc:
+        log(f"warning: v2fly archive unavailable, using per-file fetches ({exc})")
+        return
+    V2FLY_ARCHIVE.url = winner
+    V2FLY_ARCHIVE.files = files
+    V2FLY_ARCHIVE.used_cache = used_cache
+    log(f"v2fly archive: {len(files)} lists from {winner}")
+
+
+def v2fly_source_urls(source: dict[str, Any]) -> list[str]:
+    # "list": "<name>" addresses a list by name under every configured prefix.
+    urls: list[str] = []
+    list_name = str(source.get("list", "")).strip()
+    if list_name:
+        urls.extend(f"{prefix}{list_name}" for prefix in V2FLY_ARCHIVE.prefixes)
+    for url in collect_source_urls(source):
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+PrefetchTarget = tuple[tuple[str, ...], "frozenset[str] | None"]
+
+
+def collect_prefetch_targets(categories: list[dict[str, Any]]) -> list[PrefetchTarget]:
+    # (candidate URLs, include names to skip for v2fly sources or None).
+    # Candidates are resolved through fetch_candidates, so mirrors are only
+    # contacted when the primary fails or is slow enough to be hedged.
+    targets: dict[tuple[str, ...], frozenset[str] | None] = {}
+    for category in categories:
+        for source in category.get("sources", []):
+            source_type = str(source.get("type", "")).strip()
+            if not source_type or source_type == "local_domain":
+                continue
+            exclude_includes: frozenset[str] | None = None
+            if source_type == "v2fly_dlc":
+                candidates = tuple(v2fly_source_urls(source))
+                if any(V2FLY_ARCHIVE.list_name(url) for url in candidates):
+                    continue
+                exclude_includes = frozenset(
+                    str(item).strip() for item in source.get("exclude_includes", []) if str(item).strip()
+                )
+            else:
+                candidates = tuple(collect_source_urls(source))
+            if not candidates:
+                continue
+            if candidates not in targets:
+                targets[candidates] = exclude_includes
+                continue
+            known_excludes = targets[candidates]
+            if known_excludes is not None and exclude_includes is not None:
+                # Follow an include if any source referencing this file keeps it.
+                targets[candidates] = known_excludes & exclude_includes
+    return list(targets.items())
+
+
+def prefetch_one(candidates: tuple[str, ...], cache_dir: pathlib.Path) -> tuple[bytes | None, str]:
+    try:
+        data, _, winner = fetch_candidates(candidates, cache_dir, offline=False)
+    except BuildError as exc:
+        return None, str(exc)
+    return data, winner
+
+
+def prefetch_sources(
+    categories: list[dict[str, Any]],
+    cache_dir: pathlib.Path,
+    concurrency: int,
+    per_host: int,
+) -> dict[str, Any]:
+    """
+    Download every source URL (and discovered v2fly includes) into FETCH_MEMO.
+
+    Failures are only logged here; the serial build path fetches the URL again
+    and applies the usual fallback / error handling.
+    """
+    started = time.monotonic()
+    pending: deque[PrefetchTarget] = deque(collect_prefetch_targets(categories))
+    seen: set[str] = {target[0][0] for target in pending}
+    in_flight: dict[Future[tuple[bytes | None, str]], tuple[PrefetchTarget, str]] = {}
+    host_active: dict[str, int] = defaultdict(int)
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="prefetch") as pool:
+        while pending or in_flight:
+            deferred: list[PrefetchTarget] = []
+            while pending and len(in_flight) < concurrency:
+                target = pending.popleft()
+                host = urllib.parse.urlsplit(target[0][0]).netloc.lower()
+                if host_active[host] >= per_host:
+                    deferred.append(target)
+                    continue
+                host_active[host] += 1
+                in_flight[pool.submit(prefetch_one, target[0], cache_dir)] = (target, host)
+            pending.extendleft(reversed(deferred))
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                (candidates, exclude_includes), host = in_flight.pop(future)
+                host_active[host] -= 1
+                data, detail = future.result()
+                if data is None:
+                    failed += 1
+                    log(f"warning: prefetch failed for {candidates[0]} ({detail})")
+                    continue
+                if exclude_includes is None:
+                    continue
+                base_url = detail.rsplit("/", 1)[0]
+                for include_name in V2FLY_INCLUDE_RE.findall(decode_text(data)):
+                    include_url = f"{base_url}/{include_name}"
+                    if include_name in exclude_includes or include_url in seen:
+                        continue
+                    if V2FLY_ARCHIVE.list_name(include_url):
+                        continue
+                    seen.add(include_url)
+                    pending.append(((include_url,), exclude_includes))
+
+    elapsed_ms = round((time.monotonic() - started) * 1000.0, 1)
+    log(f"prefetched {len(seen)} URLs in {elapsed_ms / 1000.0:.1f}s (concurrency={concurrency}, failed={failed})")
+    return {
+        "enabled": True,
+        "concurrency": concurrency,
+        "per_host_limit": per_host,
+        "url_count": len(seen),
+        "failed_count": failed,
+        "elapsed_ms": elapsed_ms,
+    }
 
 
 def decode_text(data: bytes) -> str:
@@ -794,33 +2295,13 @@ def load_source(
         text = path.read_text(encoding="utf-8")
         return SourceBuildResult(parse_local_domain_text(text), False, source_path.as_posix())
 
-    data, used_cache, source_ref = fetch_source_bytes(source, cache_dir, offline)
-    text = decode_text(data)
-
-    if source_type == "adblock":
-        return SourceBuildResult(parse_adblock_text(text), used_cache, source_ref)
-    if source_type == "plain_cidr":
-        return SourceBuildResult(parse_plain_cidr_text(text), used_cache, source_ref)
-    if source_type == "csv_cidr_first_column":
-        return SourceBuildResult(parse_cidr_csv_first_column(text), used_cache, source_ref)
-    if source_type == "telegram_cidr":
-        return SourceBuildResult(parse_telegram_cidr_text(text), used_cache, source_ref)
-    if source_type == "apnic_country_cidr":
-        country = str(source.get("country", "")).strip()
-        if not country:
-            raise BuildError(f"source type {source_type} requires 'country'")
-        return SourceBuildResult(parse_apnic_country_cidr(text, country), used_cache, source_ref)
-    if source_type == "iana_special_csv":
-        return SourceBuildResult(parse_iana_special_csv(text), used_cache, source_ref)
-    if source_type == "aws_ip_ranges":
-        services = [str(item) for item in source.get("services", [])]
-        return SourceBuildResult(parse_aws_ip_ranges(data, services), used_cache, source_ref)
-    if source_type == "gcp_ip_ranges":
-        return SourceBuildResult(parse_gcp_ip_ranges(data), used_cache, source_ref)
-    if source_type == "iana_tld_list":
-        exclude_tlds = {str(item).strip().lower() for item in source.get("exclude_tlds", []) if str(item).strip()}
-        return SourceBuildResult(parse_iana_tld_list_text(text, exclude_tlds), used_cache, source_ref)
     if source_type == "v2fly_dlc":
+        candidates = v2fly_source_urls(source)
+        if not candidates:
+            raise BuildError("source requires at least one URL (list / url / urls / fallback_urls)")
+        source_ref = next((url for url in candidates if V2FLY_ARCHIVE.list_name(url)), "")
+        if not source_ref:
+            _, _, source_ref = fetch_candidates(tuple(candidates), cache_dir, offline)
         include_attrs = {str(item).strip() for item in source.get("include_attrs", []) if str(item).strip()}
         exclude_attrs = {str(item).strip() for item in source.get("exclude_attrs", []) if str(item).strip()}
         exclude_includes = {
@@ -836,67 +2317,383 @@ def load_source(
         )
         return SourceBuildResult(rules, used_cache_only, source_ref)
 
+    options = source_parse_options(source_type, source)
+    data, used_cache, source_ref = fetch_source_bytes(source, cache_dir, offline)
+
+    if source_type == "apnic_country_cidr":
+        index, index_reused = load_apnic_index(cache_dir, data)
+        ipv4, ipv6 = index.get(options["country"].upper(), ([], []))
+        with FETCH_LOCK:
+            PARSE_CACHE_STATS["hits" if index_reused else "misses"] += 1
+        return SourceBuildResult(collapse_cidr_ranges(ipv4, ipv6), used_cache, source_ref, index_reused)
+
+    cache_key = parsed_cache_key(source_type, options, data)
+    rules = load_parsed_rules(cache_dir, cache_key)
+    parse_cache_hit = rules is not None
+    if rules is None:
+        rules = collect_parse_job(cache_key, source_type)
+        if rules is None:
+            rules = parse_source_data(source_type, data, options)
+        store_parsed_rules(cache_dir, cache_key, rules)
+    with FETCH_LOCK:
+        PARSE_CACHE_STATS["hits" if parse_cache_hit else "misses"] += 1
+    mark_cache_entry(cache_key, (f"{cache_key}{PARSED_CACHE_SUFFIX}",), f"parsed:{source_type}:{source_ref}")
+    return SourceBuildResult(rules, used_cache, source_ref, parse_cache_hit)
+
+
+def source_parse_options(source_type: str, source: dict[str, Any]) -> dict[str, Any]:
+    # Served from the per-build country index (APNIC_INDEX_VERSION), not the parsers.
+    if source_type == "apnic_country_cidr":
+        country = str(source.get("country", "")).strip()
+        if not country:
+            raise BuildError(f"source type {source_type} requires 'country'")
+        return {"country": country}
+    if source_type not in PARSER_VERSIONS:
+        raise BuildError(f"unsupported source type: {source_type}")
+    if source_type == "aws_ip_ranges":
+        return {"services": [str(item) for item in source.get("services", [])]}
+    if source_type == "iana_tld_list":
+        exclude_tlds = {str(item).strip().lower() for item in source.get("exclude_tlds", []) if str(item).strip()}
+        return {"exclude_tlds": sorted(exclude_tlds)}
+    return {}
+
+
+def parse_source_data(source_type: str, data: bytes, options: dict[str, Any]) -> set[str]:
+    if source_type == "aws_ip_ranges":
+        return parse_aws_ip_ranges(data, options["services"])
+    if source_type == "gcp_ip_ranges":
+        return parse_gcp_ip_ranges(data)
+
+    text = decode_text(data)
+    if source_type == "adblock":
+        return parse_adblock_buffer(text)
+    if source_type == "plain_cidr":
+        return parse_plain_cidr_text(text)
+    if source_type == "csv_cidr_first_column":
+        return parse_cidr_csv_first_column(text)
+    if source_type == "telegram_cidr":
+        return parse_telegram_cidr_text(text)
+    if source_type == "iana_special_csv":
+        return parse_iana_special_csv(text)
+    if source_type == "iana_tld_list":
+        return parse_iana_tld_list_text(text, set(options["exclude_tlds"]))
+
     raise BuildError(f"unsupported source type: {source_type}")
 
 
-def write_surge_rules(path: pathlib.Path, rules: list[str]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    body = "\n".join(rules)
-    if body:
-        body += "\n"
-    path.write_text(body, encoding="utf-8")
+def split_line_chunks(data: bytes, chunk_bytes: int) -> list[bytes]:
+    chunks: list[bytes] = []
+    start = 0
+    while len(data) - start > chunk_bytes:
+        cut = data.find(b"\n", start + chunk_bytes)
+        # decode_text() drops a BOM at the start of a chunk, so never cut right before one.
+        while cut != -1 and data.startswith(codecs.BOM_UTF8, cut + 1):
+            cut = data.find(b"\n", cut + 1)
+        if cut == -1:
+            break
+        chunks.append(data[start : cut + 1])
+        start = cut + 1
+    chunks.append(data[start:])
+    return chunks
 
 
-def write_openclash_rules(path: pathlib.Path, rules: list[str]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if not rules:
-        path.write_text("payload: []\n", encoding="utf-8")
-        return
+def parse_source_chunk(source_type: str, chunk: bytes, options: dict[str, Any]) -> bytes:
+    # Runs in a worker process; newline-joined UTF-8 is far cheaper to pickle than a set.
+    return "\n".join(parse_source_data(source_type, chunk, options)).encode("utf-8")
+
+
+def schedule_source_parses(
+    categories: list[dict[str, Any]],
+    cache_dir: pathlib.Path,
+    offline: bool,
+    pool: ProcessPoolExecutor,
+) -> dict[str, int]:
+    """
+    Submit every large, not yet cached source body to the parse pool.
+
+    Bodies come from FETCH_MEMO / the cache, so this runs after prefetch.
+    Anything that fails here is left to load_source, which repeats the work
+    in-process and reports errors with the usual context.
+    """
+    stats = {"sources": 0, "chunks": 0}
+    for category in categories:
+        for source in category.get("sources", []):
+            source_type = str(source.get("type", "")).strip()
+            if source_type not in PROCESS_PARSERS:
+                continue
+            try:
+                options = source_parse_options(source_type, source)
+                data, _, _ = fetch_source_bytes(source, cache_dir, offline)
+            except BuildError:
+                continue
+            if len(data) < PARSE_OFFLOAD_MIN_BYTES:
+                continue
+            cache_key = parsed_cache_key(source_type, options, data)
+            if cache_key in PARSE_FUTURES or (cache_dir / f"{cache_key}{PARSED_CACHE_SUFFIX}").exists():
+                continue
+            chunks = split_line_chunks(data, PARSE_CHUNK_BYTES) if source_type in CHUNKED_PARSERS else [data]
+            PARSE_FUTURES[cache_key] = [
+                pool.submit(parse_source_chunk, source_type, chunk, options) for chunk in chunks
+            ]
+            stats["sources"] += 1
+            stats["chunks"] += len(chunks)
+    return stats
+
+
+def collect_parse_job(cache_key: str, source_type: str) -> set[str] | None:
+    futures = PARSE_FUTURES.pop(cache_key, None)
+    if not futures:
+        return None
+    rules: set[str] = set()
+    try:
+        for future in futures:
+            payload = future.result()
+            if payload:
+                rules.update(payload.decode("utf-8").split("\n"))
+    except BrokenProcessPool as exc:
+        log(f"warning: parse worker died, parsing in-process ({exc})")
+        return None
+    if len(futures) > 1 and source_type in CIDR_PARSERS:
+        # Ranges can meet across chunk boundaries.
+        rules = collapse_cidr_tokens(ip_rule_tokens(rules))
+    return rules
 
-    lines = ["payload:"]
-    for rule in rules:
-        escaped = rule.replace("'", "''")
-        lines.append(f"  - '{escaped}'")
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def parsed_cache_key(source_type: str, options: dict[str, Any], data: bytes) -> str:
+    parser = json.dumps(
+        [source_type, PARSER_VERSIONS[source_type], options],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(f"{hashlib.sha256(data).hexdigest()}|{parser}".encode("utf-8")).hexdigest()
+
+
+def load_apnic_index(
+    cache_dir: pathlib.Path,
+    data: bytes,
+) -> tuple[dict[str, tuple[list[tuple[int, int]], list[tuple[int, int]]]], bool]:
+    """
+    Return the country index of a delegated-apnic body and whether it was reused.
+
+    The index is built at most once per build (country sources share it) and
+    is persisted in the cache keyed by the body hash, so an unchanged file is
+    never re-scanned.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    cache_key = hashlib.sha256(f"{digest}|apnic-index|{APNIC_INDEX_VERSION}".encode("utf-8")).hexdigest()
+    cache_file = cache_dir / f"{cache_key}{APNIC_INDEX_SUFFIX}"
+    with APNIC_INDEX_LOCK:
+        index = APNIC_INDEXES.get(cache_key)
+        reused = index is not None
+        if index is None:
+            index = read_apnic_index(cache_file)
+            reused = index is not None
+        if index is None:
+            index = build_apnic_index(decode_text(data))
+            write_apnic_index(cache_file, index)
+            log(f"indexed delegated-apnic body: {len(index)} countries")
+        APNIC_INDEXES[cache_key] = index
+    mark_cache_entry(cache_key, (cache_file.name,), f"apnic-index:{digest[:24]}")
+    return index, reused
+
+
+def read_apnic_index(
+    cache_file: pathlib.Path,
+) -> dict[str, tuple[list[tuple[int, int]], list[tuple[int, int]]]] | None:
+    try:
+        payload = json.loads(gzip.decompress(cache_file.read_bytes()).decode("utf-8"))
+        if payload.get("version") != APNIC_INDEX_VERSION:
+            return None
+        return {
+            cc: ([(first, last) for first, last in ranges["ipv4"]], [(first, last) for first, last in ranges["ipv6"]])
+            for cc, ranges in payload["countries"].items()
+        }
+    except (OSError, EOFError, zlib.error, UnicodeDecodeError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_apnic_index(
+    cache_file: pathlib.Path,
+    index: dict[str, tuple[list[tuple[int, int]], list[tuple[int, int]]]],
+) -> None:
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": APNIC_INDEX_VERSION,
+        "countries": {cc: {"ipv4": ipv4, "ipv6": ipv6} for cc, (ipv4, ipv6) in index.items()},
+    }
+    tmp_file = cache_file.with_name(f".{cache_file.name}.{threading.get_ident()}.tmp")
+    tmp_file.write_bytes(gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), mtime=0))
+    tmp_file.replace(cache_file)
+
+
+def load_parsed_rules(cache_dir: pathlib.Path, cache_key: str) -> set[str] | None:
+    cache_file = cache_dir / f"{cache_key}{PARSED_CACHE_SUFFIX}"
+    try:
+        payload = gzip.decompress(cache_file.read_bytes()).decode("utf-8")
+    except (OSError, EOFError, zlib.error, UnicodeDecodeError):
+        return None
+    return {line for line in payload.split("\n") if line}
 
 
-def split_rules(rules: list[str]) -> tuple[list[str], list[str], list[str], list[str], list[str]]:
-    non_ip_rules: list[str] = []
-    ip_rules: list[str] = []
-    domain_rules: list[str] = []
-    ipcidr_payloads: list[str] = []
-    surge_domainset_lines: list[str] = []
+def store_parsed_rules(cache_dir: pathlib.Path, cache_key: str, rules: set[str]) -> None:
+    # Sorted lines keep the entry reproducible for identical parse results.
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_file = cache_dir / f"{cache_key}{PARSED_CACHE_SUFFIX}"
+    # Categories sharing a source may store the same entry from two workers.
+    tmp_file = cache_file.with_name(f".{cache_file.name}.{threading.get_ident()}.tmp")
+    payload = "\n".join(sorted(rules)).encode("utf-8")
+    tmp_file.write_bytes(gzip.compress(payload, compresslevel=6, mtime=0))
+    tmp_file.replace(cache_file)
+
+
+def encode_lines(lines: Iterable[str]) -> Iterator[bytes]:
+    # Newline-terminated UTF-8 in chunks of RENDER_CHUNK_LINES, so no body is one giant string.
+    iterator = iter(lines)
+    while batch := list(islice(iterator, RENDER_CHUNK_LINES)):
+        batch.append("")
+        yield "\n".join(batch).encode("utf-8")
 
+
+def openclash_lines(rules: Iterable[str]) -> Iterator[str]:
     for rule in rules:
-        if rule.startswith(("IP-CIDR,", "IP-CIDR6,")):
-            ip_rules.append(rule)
-            parts = rule.split(",", 2)
-            if len(parts) >= 2:
-                ipcidr_payloads.append(parts[1])
-            continue
+        escaped = rule.replace("'", "''")
+        yield f"  - '{escaped}'"
 
-        non_ip_rules.append(rule)
 
-        if rule.startswith("DOMAIN,"):
-            domain = rule.split(",", 1)[1]
-            domain_rules.append(domain)
-            surge_domainset_lines.append(domain)
-            continue
+def stream_parts(
+    parts: list[tuple[tuple[pathlib.Path, ...], Iterable[bytes]]],
+    digest_path: pathlib.Path | None = None,
+) -> tuple[int, str]:
+    """
+    Write body parts in order, each chunk to every path of its part.
 
-        if rule.startswith("DOMAIN-SUFFIX,"):
-            domain = rule.split(",", 1)[1]
-            domain_rules.append(f"+.{domain}")
-            surge_domainset_lines.append(f".{domain}")
+    Chunks are pulled lazily, so only the chunk being written is in memory.
+    A path listed by several parts gets them one after another. Returns the
+    bytes written and the sha256 of `digest_path`.
+    """
+    written = 0
+    digest = hashlib.sha256()
+    with ExitStack() as stack:
+        handles: dict[pathlib.Path, BinaryIO] = {}
+        for paths, chunks in parts:
+            for path in paths:
+                if path not in handles:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    handles[path] = stack.enter_context(path.open("wb"))
+            for chunk in chunks:
+                for path in paths:
+                    handles[path].write(chunk)
+                if digest_path in paths:
+                    digest.update(chunk)
+                written += len(chunk) * len(paths)
+    return written, digest.hexdigest()
+
+
+def render_category(
+    category_id: str,
+    rules: RuleList,
+    dist_dir: pathlib.Path,
+    write_pool: ThreadPoolExecutor | None,
+) -> tuple[str, int]:
+    """
+    Write every output format of a category; returns the surge list digest and bytes written.
 
-    return non_ip_rules, ip_rules, domain_rules, ipcidr_payloads, surge_domainset_lines
+    Each distinct body is encoded once, chunk by chunk, and every chunk goes
+    to all files sharing that body: the full lists are the non-IP body
+    followed by the IP body (the buckets are already in that order), and the
+    compat trees reuse the surge / openclash bodies. The five streams run on
+    `write_pool` when given.
+    """
+    non_ip_rules, ip_rules, domainset_lines_oc, ipcidr_lines, domainset_lines_surge = split_rules(rules)
+    surge_file = dist_dir / "surge" / f"{category_id}.list"
+    openclash_file = dist_dir / "openclash" / f"{category_id}.yaml"
+    openclash_non_ip = dist_dir / "openclash" / "non_ip" / f"{category_id}.yaml"
+    openclash_ip = dist_dir / "openclash" / "ip" / f"{category_id}.yaml"
 
+    def openclash_header(count: int) -> list[bytes]:
+        return [b"payload:\n" if count else b"payload: []\n"]
 
-def write_plain_lines(path: pathlib.Path, lines: list[str]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    content = "\n".join(lines)
-    if content:
-        content += "\n"
-    path.write_text(content, encoding="utf-8")
+    streams: list[tuple[list[tuple[tuple[pathlib.Path, ...], Iterable[bytes]]], pathlib.Path | None]] = [
+        (
+            [
+                (
+                    (
+                        surge_file,
+                        dist_dir / "surge" / "non_ip" / f"{category_id}.list",
+                        # Compatibility tree for direct replacement of common public ruleset layouts.
+                        dist_dir / "compat" / "Clash" / "non_ip" / f"{category_id}.txt",
+                        dist_dir / "compat" / "List" / "non_ip" / f"{category_id}.conf",
+                    ),
+                    encode_lines(non_ip_rules),
+                ),
+                (
+                    (
+                        surge_file,
+                        dist_dir / "surge" / "ip" / f"{category_id}.list",
+                        dist_dir / "compat" / "Clash" / "ip" / f"{category_id}.txt",
+                        dist_dir / "compat" / "List" / "ip" / f"{category_id}.conf",
+                    ),
+                    encode_lines(ip_rules),
+                ),
+            ],
+            surge_file,
+        ),
+        (
+            [
+                ((openclash_file,), openclash_header(len(rules))),
+                ((openclash_non_ip,), openclash_header(len(non_ip_rules))),
+                ((openclash_ip,), openclash_header(len(ip_rules))),
+                ((openclash_file, openclash_non_ip), encode_lines(openclash_lines(non_ip_rules))),
+                ((openclash_file, openclash_ip), encode_lines(openclash_lines(ip_rules))),
+            ],
+            None,
+        ),
+        (
+            [
+                (
+                    (
+                        dist_dir / "surge" / "domainset" / f"{category_id}.conf",
+                        dist_dir / "compat" / "List" / "domainset" / f"{category_id}.conf",
+                    ),
+                    encode_lines(domainset_lines_surge),
+                ),
+            ],
+            None,
+        ),
+        (
+            [
+                (
+                    (
+                        dist_dir / "openclash" / "domainset" / f"{category_id}.txt",
+                        dist_dir / "compat" / "Clash" / "domainset" / f"{category_id}.txt",
+                    ),
+                    encode_lines(domainset_lines_oc),
+                ),
+            ],
+            None,
+        ),
+        ([((dist_dir / "openclash" / "ipcidr" / f"{category_id}.txt",), encode_lines(ipcidr_lines))], None),
+    ]
+    if write_pool is None:
+        results = [stream_parts(parts, digest_path) for parts, digest_path in streams]
+    else:
+        futures = [write_pool.submit(stream_parts, parts, digest_path) for parts, digest_path in streams]
+        results = [future.result() for future in futures]
+    return results[0][1], sum(written for written, _ in results)
+
+
+def split_rules(rules: RuleList) -> tuple[RuleList, RuleList, Iterable[str], Iterable[str], Iterable[str]]:
+    domains = rules.buckets[RULE_ORDER["DOMAIN"]]
+    suffixes = rules.buckets[RULE_ORDER["DOMAIN-SUFFIX"]]
+    non_ip_rules = rules.select(code for code in range(len(RULE_TYPES)) if code not in IP_RULE_CODES)
+    ip_rules = rules.select(IP_RULE_CODES)
+    # Lazy, so the derived lines are only built chunk by chunk while rendering.
+    domain_rules = chain(domains, (f"+.{domain}" for domain in suffixes))
+    surge_domainset_lines = chain(domains, (f".{domain}" for domain in suffixes))
+    ipcidr_payloads = (
+        payload.partition(",")[0] for code in sorted(IP_RULE_CODES) for payload in rules.buckets[code]
+    )
+    return non_ip_rules, ip_rules, domain_rules, ipcidr_payloads, surge_domainset_lines
 
 
 def read_json(path: pathlib.Path) -> dict[str, Any]:
@@ -948,31 +2745,320 @@ def load_ignored_conflict_sets(config: dict[str, Any]) -> set[frozenset[str]]:
     return ignored
 
 
-def load_ignored_rule_conflicts(config: dict[str, Any]) -> dict[str, set[frozenset[str]]]:
-    raw = config.get("ignore_conflicts_by_rule", [])
-    if raw is None:
-        return {}
-    if not isinstance(raw, list):
-        raise BuildError("config: 'ignore_conflicts_by_rule' must be a list")
+def load_ignored_rule_conflicts(config: dict[str, Any]) -> dict[str, set[frozenset[str]]]:
+    raw = config.get("ignore_conflicts_by_rule", [])
+    if raw is None:
+        return {}
+    if not isinstance(raw, list):
+        raise BuildError("config: 'ignore_conflicts_by_rule' must be a list")
+
+    ignored: dict[str, set[frozenset[str]]] = defaultdict(set)
+    for idx, item in enumerate(raw):
+        if not isinstance(item, dict):
+            raise BuildError(f"config: ignore_conflicts_by_rule[{idx}] must be an object")
+
+        rule = str(item.get("rule", "")).strip()
+        if not rule:
+            raise BuildError(f"config: ignore_conflicts_by_rule[{idx}] missing 'rule'")
+
+        categories_raw = item.get("categories", [])
+        if not isinstance(categories_raw, list):
+            raise BuildError(f"config: ignore_conflicts_by_rule[{idx}].categories must be an array")
+        categories = {str(x).strip() for x in categories_raw if str(x).strip()}
+        if len(categories) < 2:
+            continue
+
+        ignored[rule].add(frozenset(categories))
+    return ignored
+
+
+class ConflictClassifier:
+    """
+    Conflict filters and severity model over category bit masks.
+
+    Categories map to bits in config order. The ignore lists and the reject,
+    overlay, DIRECT and action family groupings are compiled to masks once,
+    so a rule listed by one category is skipped with one integer test and
+    the rest need no per-rule sets. Results are memoised per mask: a handful
+    of category combinations covers almost every shared rule.
+    """
+
+    def __init__(
+        self,
+        category_actions: dict[str, str],
+        ignored_conflict_sets: set[frozenset[str]],
+        ignored_rule_conflicts: dict[str, set[frozenset[str]]],
+    ) -> None:
+        self.category_actions = category_actions
+        self.bits = {category_id: 1 << position for position, category_id in enumerate(category_actions)}
+        self.direct_bit = self.bits.get("direct", 0)
+        self.reject_like_mask = self.mask(REJECT_LIKE_CATEGORIES)
+        self.overlay_mask = self.mask(OVERLAY_CATEGORIES)
+        self.direct_action_mask = self.mask(cid for cid, action in category_actions.items() if action == "DIRECT")
+        self.family_masks: dict[str, int] = defaultdict(int)
+        for category_id, action in category_actions.items():
+            self.family_masks[action_family(action)] |= self.bits[category_id]
+        # A set naming an unknown category can never match, so it is dropped.
+        self.ignored_masks = {
+            self.mask(category_set) for category_set in ignored_conflict_sets if category_set <= self.bits.keys()
+        }
+        self.ignored_rule_masks = {
+            rule: {self.mask(category_set) for category_set in category_sets if category_set <= self.bits.keys()}
+            for rule, category_sets in ignored_rule_conflicts.items()
+        }
+        self.memo: dict[int, dict[str, Any] | None] = {}
+
+    def mask(self, category_ids: Iterable[str]) -> int:
+        mask = 0
+        for category_id in category_ids:
+            mask |= self.bits.get(category_id, 0)
+        return mask
+
+    def categories(self, mask: int) -> list[str]:
+        return sorted(category_id for category_id, bit in self.bits.items() if mask & bit)
+
+    def classify(self, mask: int, rules: tuple[str, ...]) -> dict[str, Any] | None:
+        """
+        Classify the categories in `mask` overlapping on `rules`, or None for an expected overlap.
+
+        The result carries the categories, actions, type and severity fields of
+        a conflicts.json entry. An ignore_conflicts_by_rule entry for any of
+        `rules` silences the overlap.
+        """
+        if mask & (mask - 1) == 0:
+            return None
+
+        # "direct" is an aggregate convenience set. If this rule is also present in
+        # other explicit DIRECT categories, evaluate conflicts on concrete categories first.
+        if mask & self.direct_bit and mask & self.direct_action_mask & ~self.direct_bit:
+            mask &= ~self.direct_bit
+            if mask & (mask - 1) == 0:
+                return None
+
+        rule_masks = [self.ignored_rule_masks[rule] for rule in rules if rule in self.ignored_rule_masks]
+        if any(mask in masks for masks in rule_masks):
+            return None
+        if not rule_masks and mask in self.memo:
+            return self.memo[mask]
+
+        conflict = self.classify_mask(mask)
+        if not rule_masks:
+            self.memo[mask] = conflict
+        return conflict
+
+    def classify_mask(self, mask: int) -> dict[str, Any] | None:
+        if mask in self.ignored_masks:
+            return None
+
+        # Reject-family overlap (including between the intentionally split reject layers)
+        # is expected in ad/tracker feeds.
+        if mask & self.reject_like_mask:
+            return None
+
+        # direct is an aggregate of direct-like categories; same-action overlap is expected.
+        if mask & self.direct_bit and not mask & ~self.direct_bit & ~self.direct_action_mask:
+            return None
+
+        # global/gfw/tld_proxy are overlay sets and intentionally overlap.
+        if mask & self.overlay_mask:
+            return None
+
+        families = {family for family, family_mask in self.family_masks.items() if mask & family_mask}
+        if len(families) <= 1:
+            conflict_type = "same_action_overlap"
+            severity = "low"
+        elif "DIRECT" in families and "PROXY" in families:
+            conflict_type = "direct_proxy_conflict"
+            severity = "high"
+        elif "DIRECT" in families and "REJECT" in families:
+            conflict_type = "direct_reject_conflict"
+            severity = "high"
+        elif "PROXY" in families and "REJECT" in families:
+            conflict_type = "proxy_reject_conflict"
+            severity = "medium"
+        else:
+            conflict_type = "cross_action_conflict"
+            severity = "medium"
+
+        category_ids = self.categories(mask)
+        return {
+            "categories": category_ids,
+            "actions": [
+                {
+                    "category": cid,
+                    "action": self.category_actions[cid],
+                    "action_family": action_family(self.category_actions[cid]),
+                }
+                for cid in category_ids
+            ],
+            "type": conflict_type,
+            "severity": severity,
+        }
+
+
+def find_suffix_conflicts(
+    domain_index: dict[str, int],
+    suffix_index: dict[str, int],
+    classifier: ConflictClassifier,
+    category_priorities: dict[str, int],
+) -> list[dict[str, Any]]:
+    """
+    Report DOMAIN / DOMAIN-SUFFIX rules covered by another category's broader DOMAIN-SUFFIX.
+
+    The indexes map payloads to the mask of categories listing them. Every
+    suffix goes into one trie keyed by reversed labels ("" holds its mask),
+    and each distinct domain walks its own labels once, so the pass is linear
+    in the label count. A covered rule is "shadowed" when a covering category
+    is matched first (lower priority) and "overlapping" when it is an
+    exception matched before the suffix.
+    """
+    trie: dict[str, Any] = {}
+    for suffix, mask in suffix_index.items():
+        node = trie
+        for label in reversed(suffix.split(".")):
+            node = node.setdefault(label, {})
+        node[""] = mask
+
+    def rank(category_id: str) -> tuple[int, str]:
+        return category_priorities.get(category_id, 9999), category_id
+
+    conflicts: list[dict[str, Any]] = []
+    for rule_type, index in (("DOMAIN", domain_index), ("DOMAIN-SUFFIX", suffix_index)):
+        for domain, mask in index.items():
+            labels = domain.split(".")
+            # A DOMAIN is covered by a suffix ending at or above it, a DOMAIN-SUFFIX
+            # only by one strictly above it (equal suffixes are exact overlaps).
+            last = len(labels) if rule_type == "DOMAIN" else len(labels) - 1
+            node = trie
+            for depth in range(1, last + 1):
+                node = node.get(labels[-depth])
+                if node is None:
+                    break
+                covering_mask = node.get("", 0)
+                if not mask & ~covering_mask:
+                    continue
+                rule = f"{rule_type},{domain}"
+                covering_rule = f"DOMAIN-SUFFIX,{'.'.join(labels[-depth:])}"
+                conflict = classifier.classify(covering_mask | mask, (rule, covering_rule))
+                if conflict is None:
+                    continue
+                covering = [cid for cid in conflict["categories"] if classifier.bits[cid] & covering_mask]
+                covered = [cid for cid in conflict["categories"] if not classifier.bits[cid] & covering_mask]
+                if not covering or not covered:
+                    continue
+                shadowed = min(map(rank, covering)) < min(map(rank, covered))
+                conflicts.append(
+                    {
+                        "kind": "domain_suffix",
+                        "rule": rule,
+                        "covered_by": covering_rule,
+                        "relation": "shadowed" if shadowed else "overlapping",
+                        "covering_categories": covering,
+                        "covered_categories": covered,
+                        **conflict,
+                    }
+                )
 
-    ignored: dict[str, set[frozenset[str]]] = defaultdict(set)
-    for idx, item in enumerate(raw):
-        if not isinstance(item, dict):
-            raise BuildError(f"config: ignore_conflicts_by_rule[{idx}] must be an object")
+    conflicts.sort(
+        key=lambda item: (
+            SEVERITY_WEIGHT.get(str(item.get("severity", "low")), 3),
+            len(item["categories"]) * -1,
+            item["rule"],
+            item["covered_by"],
+        )
+    )
+    return conflicts
 
-        rule = str(item.get("rule", "")).strip()
-        if not rule:
-            raise BuildError(f"config: ignore_conflicts_by_rule[{idx}] missing 'rule'")
 
-        categories_raw = item.get("categories", [])
-        if not isinstance(categories_raw, list):
-            raise BuildError(f"config: ignore_conflicts_by_rule[{idx}].categories must be an array")
-        categories = {str(x).strip() for x in categories_raw if str(x).strip()}
-        if len(categories) < 2:
+def find_cidr_conflicts(
+    ipv4_index: dict[str, int],
+    ipv6_index: dict[str, int],
+    classifier: ConflictClassifier,
+    category_priorities: dict[str, int],
+) -> list[dict[str, Any]]:
+    """
+    Report IP-CIDR / IP-CIDR6 rules that overlap a rule of a category with another action family.
+
+    The indexes map payloads to the mask of categories listing them. Each
+    family is swept once in start order (broader blocks first); the active
+    list only holds blocks still open at the current start, which is at most
+    one per category since a category's ranges are collapsed. Identical
+    payloads are left to the exact pass. "relation" follows
+    find_suffix_conflicts for nested blocks and is "partial" otherwise.
+    """
+    families = {
+        bit: action_family(classifier.category_actions[category_id]) for category_id, bit in classifier.bits.items()
+    }
+    # (narrower rule, broader rule) -> overlap (bits, first, last, nested), and the masks of
+    # the categories listing the broader and the narrower rule.
+    overlaps: dict[tuple[str, str], tuple[int, int, int, bool]] = {}
+    sides: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0])
+    for rule_type, index, bits in (("IP-CIDR", ipv4_index, 32), ("IP-CIDR6", ipv6_index, 128)):
+        blocks: list[tuple[int, int, str, int]] = []
+        for payload, mask in index.items():
+            ipv4, ipv6 = parse_cidr_ranges((payload.partition(",")[0],))
+            rule = f"{rule_type},{payload}"
+            for first, last in ipv4 if bits == 32 else ipv6:
+                blocks.extend((first, -last, rule, bit) for bit in families if mask & bit)
+        blocks.sort()
+
+        active: list[tuple[int, int, str, int]] = []
+        for first, negative_last, rule, bit in blocks:
+            last = -negative_last
+            active = [block for block in active if block[0] >= first]
+            for open_last, _, open_rule, open_bit in active:
+                if open_rule == rule or families[open_bit] == families[bit]:
+                    continue
+                key = (rule, open_rule)
+                overlaps[key] = (bits, first, min(last, open_last), open_last >= last)
+                sides[key][0] |= open_bit
+                sides[key][1] |= bit
+            active.append((last, first, rule, bit))
+
+    def rank(category_id: str) -> tuple[int, str]:
+        return category_priorities.get(category_id, 9999), category_id
+
+    conflicts: list[dict[str, Any]] = []
+    for (rule, broader_rule), (bits, first, last, nested) in overlaps.items():
+        broader_mask, narrower_mask = sides[(rule, broader_rule)]
+        conflict = classifier.classify(broader_mask | narrower_mask, (rule, broader_rule))
+        if conflict is None or conflict["type"] == "same_action_overlap":
             continue
+        covering = [cid for cid in conflict["categories"] if classifier.bits[cid] & broader_mask]
+        covered = [
+            cid for cid in conflict["categories"] if classifier.bits[cid] & narrower_mask & ~broader_mask
+        ]
+        if not covering or not covered:
+            continue
+        if not nested:
+            relation = "partial"
+        elif min(map(rank, covering)) < min(map(rank, covered)):
+            relation = "shadowed"
+        else:
+            relation = "overlapping"
+        address = ipaddress.IPv4Address if bits == 32 else ipaddress.IPv6Address
+        conflicts.append(
+            {
+                "kind": "cidr_overlap",
+                "rule": rule,
+                "covered_by": broader_rule,
+                "relation": relation,
+                "overlap": {"first": str(address(first)), "last": str(address(last))},
+                "covering_categories": covering,
+                "covered_categories": covered,
+                **conflict,
+            }
+        )
 
-        ignored[rule].add(frozenset(categories))
-    return ignored
+    conflicts.sort(
+        key=lambda item: (
+            SEVERITY_WEIGHT.get(str(item.get("severity", "low")), 3),
+            len(item["categories"]) * -1,
+            item["rule"],
+            item["covered_by"],
+        )
+    )
+    return conflicts
 
 
 def render_policy_reference_markdown(categories: list[dict[str, Any]]) -> str:
@@ -1067,12 +3153,112 @@ def render_rule_catalog_markdown(categories: list[dict[str, Any]]) -> str:
     return "\n".join(lines)
 
 
+def remove_filtered_rules(rules: set[str], filter_rules: set[str]) -> int:
+    """
+    Remove from `rules` everything an allow / exclude list covers; returns rules removed or trimmed.
+
+    Entries match verbatim as before. A DOMAIN-SUFFIX entry also removes the
+    DOMAIN / DOMAIN-SUFFIX rules at or below it (reversed-label trie, one walk
+    per rule), and IP-CIDR entries are subtracted from every overlapping IP
+    rule, which keeps only the remainder of a broader block.
+    """
+    covered = rules & filter_rules
+
+    trie: dict[str, Any] = {}
+    for rule in filter_rules:
+        if rule.startswith("DOMAIN-SUFFIX,"):
+            node = trie
+            for label in reversed(rule[len("DOMAIN-SUFFIX,") :].split(".")):
+                node = node.setdefault(label, {})
+            node[""] = True
+    if trie:
+        for rule in rules:
+            rule_type, _, domain = rule.partition(",")
+            if rule_type != "DOMAIN" and rule_type != "DOMAIN-SUFFIX":
+                continue
+            node = trie
+            for label in reversed(domain.split(".")):
+                node = node.get(label)
+                if node is None:
+                    break
+                if "" in node:
+                    covered.add(rule)
+                    break
+    rules.difference_update(covered)
+    removed = len(covered)
+
+    filtered_v4, filtered_v6 = parse_cidr_ranges(ip_rule_tokens(filter_rules))
+    if not filtered_v4 and not filtered_v6:
+        return removed
+    filtered = (merge_cidr_ranges(filtered_v4, 32), merge_cidr_ranges(filtered_v6, 128))
+    starts = ([first for first, _ in filtered[0]], [first for first, _ in filtered[1]])
+    trimmed: list[str] = []
+    remainder: tuple[list[tuple[int, int]], list[tuple[int, int]]] = ([], [])
+    for rule in rules:
+        if not rule.startswith(("IP-CIDR,", "IP-CIDR6,")):
+            continue
+        for family, ranges in enumerate(parse_cidr_ranges(ip_rule_tokens((rule,)))):
+            for first, last in ranges:
+                position = bisect.bisect_right(starts[family], last) - 1
+                if position >= 0 and filtered[family][position][1] >= first:
+                    trimmed.append(rule)
+                    remainder[family].append((first, last))
+    if trimmed:
+        rules.difference_update(trimmed)
+        rules.update(
+            collapse_cidr_ranges(
+                subtract_cidr_ranges(merge_cidr_ranges(remainder[0], 32), filtered[0]),
+                subtract_cidr_ranges(merge_cidr_ranges(remainder[1], 128), filtered[1]),
+            )
+        )
+    return removed + len(trimmed)
+
+
+def drop_covered_domain_rules(rules: set[str]) -> dict[str, int]:
+    """
+    Remove DOMAIN / DOMAIN-SUFFIX rules already matched by a broader DOMAIN-SUFFIX.
+
+    Suffixes are stored in a trie keyed by reversed labels ("" marks the end
+    of a suffix). A DOMAIN is covered by a suffix ending at or above it, a
+    DOMAIN-SUFFIX only by one strictly above it. Returns removals per type.
+    """
+    trie: dict[str, Any] = {}
+    for rule in rules:
+        if rule.startswith("DOMAIN-SUFFIX,"):
+            node = trie
+            for label in reversed(rule[len("DOMAIN-SUFFIX,") :].split(".")):
+                node = node.setdefault(label, {})
+            node[""] = True
+
+    removed = {"DOMAIN": 0, "DOMAIN-SUFFIX": 0}
+    covered: list[str] = []
+    for rule in rules:
+        rule_type, _, domain = rule.partition(",")
+        if rule_type not in removed:
+            continue
+        labels = domain.split(".")
+        # Depth at which a matching suffix covers this rule.
+        last = len(labels) if rule_type == "DOMAIN" else len(labels) - 1
+        node = trie
+        for label in reversed(labels[len(labels) - last :]):
+            node = node.get(label)
+            if node is None:
+                break
+            if "" in node:
+                covered.append(rule)
+                removed[rule_type] += 1
+                break
+    rules.difference_update(covered)
+    return removed
+
+
 def build_category(
     category: dict[str, Any],
     root_dir: pathlib.Path,
     cache_dir: pathlib.Path,
     offline: bool,
-) -> tuple[list[str], list[dict[str, Any]]]:
+    drop_covered: bool = False,
+) -> tuple[RuleList, list[dict[str, Any]], dict[str, Any]]:
     category_id = str(category.get("id", "")).strip()
     if not category_id:
         raise BuildError("category missing 'id'")
@@ -1093,6 +3279,7 @@ def build_category(
                 "authority": source.get("authority", "unspecified"),
                 "ref": result.source_ref,
                 "used_cache": result.used_cache,
+                "parse_cache_hit": result.parse_cache_hit,
                 "rule_count": len(result.rules),
             }
         )
@@ -1102,9 +3289,7 @@ def build_category(
         exclusion_file = root_dir / str(exclude_path)
         if exclusion_file.exists():
             exclude_rules = parse_local_domain_text(exclusion_file.read_text(encoding="utf-8"))
-            before_count = len(rules)
-            rules.difference_update(exclude_rules)
-            removed = before_count - len(rules)
+            removed = remove_filtered_rules(rules, exclude_rules)
             if removed > 0:
                 log(f"{category_id}: removed {removed} rules from exclusion file")
 
@@ -1113,14 +3298,301 @@ def build_category(
         allow_file = root_dir / str(allow_path)
         if allow_file.exists():
             allow_rules = parse_local_domain_text(allow_file.read_text(encoding="utf-8"))
-            before_count = len(rules)
-            rules.difference_update(allow_rules)
-            removed = before_count - len(rules)
+            removed = remove_filtered_rules(rules, allow_rules)
             if removed > 0:
                 log(f"{category_id}: removed {removed} rules from allowlist file")
 
-    sorted_rules = sorted(rules, key=rule_sort_key)
-    return sorted_rules, source_meta
+    ip_rules = [rule for rule in rules if rule.startswith(("IP-CIDR,", "IP-CIDR6,"))]
+    if ip_rules:
+        collapsed = collapse_cidr_tokens(ip_rule_tokens(ip_rules))
+        if len(collapsed) < len(ip_rules):
+            rules.difference_update(ip_rules)
+            rules.update(collapsed)
+            log(f"{category_id}: collapsed {len(ip_rules)} IP rules into {len(collapsed)}")
+
+    suffix_coverage: dict[str, Any] = {"enabled": drop_covered, "removed_domain": 0, "removed_domain_suffix": 0}
+    if drop_covered:
+        removed_by_type = drop_covered_domain_rules(rules)
+        suffix_coverage["removed_domain"] = removed_by_type["DOMAIN"]
+        suffix_coverage["removed_domain_suffix"] = removed_by_type["DOMAIN-SUFFIX"]
+        removed = removed_by_type["DOMAIN"] + removed_by_type["DOMAIN-SUFFIX"]
+        if removed > 0:
+            log(f"{category_id}: removed {removed} rules covered by a broader DOMAIN-SUFFIX")
+
+    return RuleList.from_rules(rules), source_meta, suffix_coverage
+
+
+def builder_digest() -> str:
+    # Any change to this script may change outputs, so it versions the state.
+    return hashlib.sha256(pathlib.Path(__file__).read_bytes()).hexdigest()
+
+
+def load_build_state(
+    cache_dir: pathlib.Path,
+    dist_dir: pathlib.Path,
+    options: dict[str, Any],
+) -> dict[str, dict[str, Any]]:
+    state_file = cache_dir / BUILD_STATE_NAME
+    if not state_file.exists():
+        return {}
+    try:
+        state = read_json(state_file)
+    except (OSError, ValueError) as exc:
+        log(f"warning: ignoring unreadable build state {state_file}: {exc}")
+        return {}
+    if (
+        state.get("version") != BUILD_STATE_VERSION
+        or state.get("builder") != builder_digest()
+        or state.get("dist_dir") != str(dist_dir.resolve())
+        or state.get("options") != options
+    ):
+        return {}
+    categories = state.get("categories")
+    return categories if isinstance(categories, dict) else {}
+
+
+def write_build_state(
+    cache_dir: pathlib.Path,
+    dist_dir: pathlib.Path,
+    options: dict[str, Any],
+    categories: dict[str, dict[str, Any]],
+) -> None:
+    state = {
+        "version": BUILD_STATE_VERSION,
+        "builder": builder_digest(),
+        "dist_dir": str(dist_dir.resolve()),
+        "options": options,
+        "categories": categories,
+    }
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    state_file = cache_dir / BUILD_STATE_NAME
+    tmp_file = state_file.with_name(f".{BUILD_STATE_NAME}.tmp")
+    tmp_file.write_text(json.dumps(state, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    tmp_file.replace(state_file)
+
+
+def v2fly_include_closure(url: str) -> list[str]:
+    seen = {url}
+    pending = [url]
+    with FETCH_LOCK:
+        while pending:
+            for include_url in V2FLY_INCLUDES.get(pending.pop(), ()):
+                if include_url not in seen:
+                    seen.add(include_url)
+                    pending.append(include_url)
+    return sorted(seen)
+
+
+def category_input_keys(category: dict[str, Any], source_meta: list[dict[str, Any]]) -> set[str]:
+    keys: set[str] = set()
+    for meta in source_meta:
+        if meta["type"] == "local_domain":
+            keys.add(f"file:{meta['ref']}")
+        elif meta["type"] == "v2fly_dlc":
+            keys.update(f"v2fly:{url}" for url in v2fly_include_closure(meta["ref"]))
+        else:
+            keys.add(f"url:{meta['ref']}")
+    for path_key in ("exclude_rules_path", "allow_rules_path"):
+        if category.get(path_key):
+            keys.add(f"file:{category[path_key]}")
+    return keys
+
+
+def input_digest(key: str, cache_dir: pathlib.Path, offline: bool) -> str:
+    kind, _, ref = key.partition(":")
+    if kind == "file":
+        path = ROOT_DIR / ref
+        return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else "missing"
+    digest = BODY_DIGESTS.get(key)
+    if digest is None:
+        data = V2FLY_ARCHIVE.files.get(V2FLY_ARCHIVE.list_name(ref)) if kind == "v2fly" else None
+        if data is None:
+            data, _ = fetch_bytes(ref, cache_dir, offline=offline)
+        digest = hashlib.sha256(data).hexdigest()
+        BODY_DIGESTS[key] = digest
+    return digest
+
+
+def category_inputs(
+    category: dict[str, Any],
+    policy_entry: dict[str, Any],
+    keys: Iterable[str],
+    cache_dir: pathlib.Path,
+    offline: bool,
+) -> dict[str, str]:
+    inputs = {
+        "config": hashlib.sha256(json.dumps(category, sort_keys=True).encode("utf-8")).hexdigest(),
+        "policy": hashlib.sha256(json.dumps(policy_entry, sort_keys=True).encode("utf-8")).hexdigest(),
+    }
+    for key in sorted(keys):
+        inputs[key] = input_digest(key, cache_dir, offline)
+    return inputs
+
+
+def reuse_category(
+    category: dict[str, Any],
+    policy_map: dict[str, dict[str, Any]],
+    previous: dict[str, Any],
+    dist_dir: pathlib.Path,
+    reuse_dir: pathlib.Path,
+    cache_dir: pathlib.Path,
+    offline: bool,
+) -> CategoryBuildResult | None:
+    """
+    Copy a category's outputs from the previous dist tree if its inputs are unchanged.
+
+    The inputs are the ones recorded by the previous build: category config,
+    policy entry, local files and the body of every list it read (including
+    v2fly includes). Returns None when anything differs or is missing, and
+    the category is then built normally.
+    """
+    category_id = str(category.get("id", "")).strip()
+    recorded = previous.get("inputs")
+    metadata = previous.get("metadata")
+    if not isinstance(recorded, dict) or not isinstance(metadata, dict):
+        return None
+    try:
+        current = category_inputs(
+            category,
+            policy_map.get(category_id, {}),
+            (key for key in recorded if ":" in key),
+            cache_dir,
+            offline,
+        )
+    except BuildError:
+        return None
+    if current != recorded:
+        return None
+
+    relative_paths = [str(value) for key, value in metadata.items() if key.endswith("_path")]
+    relative_paths.append(f"meta/{category_id}.json")
+    try:
+        rules_data = (reuse_dir / str(metadata["surge_path"])).read_bytes()
+        if hashlib.sha256(rules_data).hexdigest() != previous.get("rules_digest"):
+            return None
+        for relative_path in relative_paths:
+            target = dist_dir / relative_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(reuse_dir / relative_path, target)
+    except (KeyError, OSError):
+        return None
+
+    rules = RuleList.from_rules(rules_data.decode("utf-8").split("\n")[:-1])
+    action = str(metadata["recommended_action"])
+    return CategoryBuildResult(category_id, rules, action, metadata, previous, reused=True)
+
+
+def build_and_write_category(
+    category: dict[str, Any],
+    policy_map: dict[str, dict[str, Any]],
+    dist_dir: pathlib.Path,
+    cache_dir: pathlib.Path,
+    offline: bool,
+    drop_covered: bool = False,
+    write_pool: ThreadPoolExecutor | None = None,
+) -> CategoryBuildResult:
+    category_id = str(category.get("id", "")).strip()
+    if not category_id:
+        raise BuildError("category missing id")
+    log(f"building category: {category_id}")
+
+    rules, source_meta, suffix_coverage = build_category(category, ROOT_DIR, cache_dir, offline, drop_covered)
+
+    policy_entry = policy_map.get(category_id, {})
+    action = str(policy_entry.get("action", "UNSPECIFIED")).upper().strip()
+    if action not in ALLOWED_ACTIONS:
+        raise BuildError(f"policy map: invalid action '{action}' for category '{category_id}'")
+    priority = int(policy_entry.get("priority", 9999))
+    note = str(policy_entry.get("note", "")).strip()
+
+    surge_file = dist_dir / "surge" / f"{category_id}.list"
+    openclash_file = dist_dir / "openclash" / f"{category_id}.yaml"
+    render_started = time.perf_counter()
+    rules_digest, bytes_written = render_category(category_id, rules, dist_dir, write_pool)
+    render_seconds = time.perf_counter() - render_started
+    log(f"{category_id}: rendered {bytes_written} bytes in {render_seconds * 1000.0:.1f} ms")
+
+    metadata = {
+        "id": category_id,
+        "description": category.get("description", ""),
+        "rule_count": len(rules),
+        "surge_path": str(surge_file.relative_to(dist_dir)),
+        "openclash_path": str(openclash_file.relative_to(dist_dir)),
+        "surge_non_ip_path": str((dist_dir / "surge" / "non_ip" / f"{category_id}.list").relative_to(dist_dir)),
+        "surge_ip_path": str((dist_dir / "surge" / "ip" / f"{category_id}.list").relative_to(dist_dir)),
+        "surge_domainset_path": str((dist_dir / "surge" / "domainset" / f"{category_id}.conf").relative_to(dist_dir)),
+        "openclash_non_ip_path": str((dist_dir / "openclash" / "non_ip" / f"{category_id}.yaml").relative_to(dist_dir)),
+        "openclash_ip_path": str((dist_dir / "openclash" / "ip" / f"{category_id}.yaml").relative_to(dist_dir)),
+        "openclash_domainset_path": str((dist_dir / "openclash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
+        "openclash_ipcidr_path": str((dist_dir / "openclash" / "ipcidr" / f"{category_id}.txt").relative_to(dist_dir)),
+        "compat_clash_non_ip_path": str((dist_dir / "compat" / "Clash" / "non_ip" / f"{category_id}.txt").relative_to(dist_dir)),
+        "compat_clash_ip_path": str((dist_dir / "compat" / "Clash" / "ip" / f"{category_id}.txt").relative_to(dist_dir)),
+        "compat_clash_domainset_path": str((dist_dir / "compat" / "Clash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
+        "compat_list_non_ip_path": str((dist_dir / "compat" / "List" / "non_ip" / f"{category_id}.conf").relative_to(dist_dir)),
+        "compat_list_ip_path": str((dist_dir / "compat" / "List" / "ip" / f"{category_id}.conf").relative_to(dist_dir)),
+        "compat_list_domainset_path": str((dist_dir / "compat" / "List" / "domainset" / f"{category_id}.conf").relative_to(dist_dir)),
+        "recommended_action": action,
+        "recommended_priority": priority,
+        "recommended_note": note,
+        "sources": source_meta,
+    }
+
+    # Per-category sidecar metadata for auditing and ops.
+    sidecar_dir = dist_dir / "meta"
+    sidecar_dir.mkdir(parents=True, exist_ok=True)
+    sidecar_path = sidecar_dir / f"{category_id}.json"
+    sidecar_path.write_text(
+        json.dumps(
+            {
+                "id": category_id,
+                "description": category.get("description", ""),
+                "recommended_action": action,
+                "recommended_priority": priority,
+                "recommended_note": note,
+                "rule_count": len(rules),
+                "suffix_coverage": suffix_coverage,
+                "paths": {
+                    "surge": str(surge_file.relative_to(dist_dir)),
+                    "surge_non_ip": str((dist_dir / "surge" / "non_ip" / f"{category_id}.list").relative_to(dist_dir)),
+                    "surge_ip": str((dist_dir / "surge" / "ip" / f"{category_id}.list").relative_to(dist_dir)),
+                    "surge_domainset": str((dist_dir / "surge" / "domainset" / f"{category_id}.conf").relative_to(dist_dir)),
+                    "openclash": str(openclash_file.relative_to(dist_dir)),
+                    "openclash_non_ip": str((dist_dir / "openclash" / "non_ip" / f"{category_id}.yaml").relative_to(dist_dir)),
+                    "openclash_ip": str((dist_dir / "openclash" / "ip" / f"{category_id}.yaml").relative_to(dist_dir)),
+                    "openclash_domainset": str((dist_dir / "openclash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
+                    "openclash_ipcidr": str((dist_dir / "openclash" / "ipcidr" / f"{category_id}.txt").relative_to(dist_dir)),
+                    "compat_clash_non_ip": str((dist_dir / "compat" / "Clash" / "non_ip" / f"{category_id}.txt").relative_to(dist_dir)),
+                    "compat_clash_ip": str((dist_dir / "compat" / "Clash" / "ip" / f"{category_id}.txt").relative_to(dist_dir)),
+                    "compat_clash_domainset": str((dist_dir / "compat" / "Clash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
+                    "compat_list_non_ip": str((dist_dir / "compat" / "List" / "non_ip" / f"{category_id}.conf").relative_to(dist_dir)),
+                    "compat_list_ip": str((dist_dir / "compat" / "List" / "ip" / f"{category_id}.conf").relative_to(dist_dir)),
+                    "compat_list_domainset": str((dist_dir / "compat" / "List" / "domainset" / f"{category_id}.conf").relative_to(dist_dir))
+                },
+                "sources": source_meta
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+    state = {
+        "inputs": category_inputs(
+            category, policy_entry, category_input_keys(category, source_meta), cache_dir, offline
+        ),
+        "rules_digest": rules_digest,
+        "metadata": metadata,
+    }
+    return CategoryBuildResult(
+        category_id,
+        rules,
+        action,
+        metadata,
+        state,
+        bytes_written=bytes_written,
+        render_seconds=render_seconds,
+    )
 
 
 def build_all(
@@ -1131,9 +3603,40 @@ def build_all(
     offline: bool,
     fail_on_conflicts: bool,
     fail_on_cross_action_conflicts: bool,
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    fetch_per_host: int = DEFAULT_FETCH_PER_HOST,
+    cache_keep_builds: int = DEFAULT_CACHE_KEEP_BUILDS,
+    cache_max_mb: int = DEFAULT_CACHE_MAX_MB,
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    fetch_retries: int = DEFAULT_FETCH_RETRIES,
+    breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+    parse_jobs: int = DEFAULT_PARSE_JOBS,
+    category_workers: int = DEFAULT_CATEGORY_WORKERS,
+    incremental: bool = True,
+    reuse_dist_dir: pathlib.Path | None = None,
+    drop_covered_rules: bool = False,
+    write_workers: int = DEFAULT_WRITE_WORKERS,
 ) -> int:
     FETCH_MEMO.clear()
     FETCH_EVENTS.clear()
+    FETCH_TIMINGS.clear()
+    FETCH_FAILURES.clear()
+    CACHE_USAGE.clear()
+    FETCH_WINNERS.clear()
+    FETCH_RACES.clear()
+    FETCH_RETRIES.clear()
+    V2FLY_SUBTREE_MEMO.clear()
+    PARSE_FUTURES.clear()
+    APNIC_INDEXES.clear()
+    BODY_DIGESTS.clear()
+    V2FLY_INCLUDES.clear()
+    RULE_PAYLOADS.clear()
+    V2FLY_SUBTREE_STATS.update(hits=0, misses=0)
+    PARSE_CACHE_STATS.update(hits=0, misses=0)
+    FETCH_SETTINGS.hedge_delay = hedge_delay
+    FETCH_SETTINGS.retries = fetch_retries
+    HOST_BREAKER.reset(threshold=breaker_threshold)
+    HTTP_POOL.reset(max_idle_per_host=max(1, fetch_per_host))
     config = read_json(config_path)
     policy_map = load_policy_map(policy_path)
     ignored_conflict_sets = load_ignored_conflict_sets(config)
@@ -1141,6 +3644,13 @@ def build_all(
     categories = config.get("categories", [])
     if not isinstance(categories, list) or not categories:
         raise BuildError("config has no categories")
+    seen_ids: set[str] = set()
+    for category in categories:
+        category_id = str(category.get("id", "")).strip()
+        if category_id in seen_ids:
+            raise BuildError(f"duplicate category id: {category_id}")
+        if category_id:
+            seen_ids.add(category_id)
 
     dist_dir.mkdir(parents=True, exist_ok=True)
     removed_duplicates = purge_duplicate_artifacts(dist_dir)
@@ -1160,215 +3670,119 @@ def build_all(
         if stale_file.exists():
             stale_file.unlink()
 
-    surge_dir = dist_dir / "surge"
-    openclash_dir = dist_dir / "openclash"
+    load_v2fly_archive(config, cache_dir, offline)
+    prefetch_stats: dict[str, Any] | None = None
+    if not offline and fetch_concurrency > 0:
+        prefetch_stats = prefetch_sources(categories, cache_dir, fetch_concurrency, max(1, fetch_per_host))
+
+    # Unchanged categories are copied from the previous dist tree up front, so
+    # the parse pool only sees sources of categories that are rebuilt.
+    # Build options that change category outputs; a different set invalidates the state.
+    state_options = {"drop_covered_rules": drop_covered_rules}
+    reused_results: dict[str, CategoryBuildResult] = {}
+    if incremental and reuse_dist_dir is not None:
+        previous_state = load_build_state(cache_dir, reuse_dist_dir, state_options)
+        for category in categories:
+            category_id = str(category.get("id", "")).strip()
+            previous = previous_state.get(category_id)
+            if not isinstance(previous, dict):
+                continue
+            reused = reuse_category(category, policy_map, previous, dist_dir, reuse_dist_dir, cache_dir, offline)
+            if reused is not None:
+                log(f"reusing category: {category_id} (inputs unchanged)")
+                reused_results[category_id] = reused
+    pending_categories = [
+        category for category in categories if str(category.get("id", "")).strip() not in reused_results
+    ]
 
-    rules_by_category: dict[str, list[str]] = {}
+    rules_by_category: dict[str, RuleList] = {}
     category_actions: dict[str, str] = {}
     metadata_categories: list[dict[str, Any]] = []
     missing_policy: list[str] = []
 
-    for category in categories:
-        category_id = str(category.get("id", "")).strip()
-        if not category_id:
-            raise BuildError("category missing id")
-        log(f"building category: {category_id}")
-
-        rules, source_meta = build_category(category, ROOT_DIR, cache_dir, offline)
-        rules_by_category[category_id] = rules
-
-        policy_entry = policy_map.get(category_id, {})
-        action = str(policy_entry.get("action", "UNSPECIFIED")).upper().strip()
-        if action not in ALLOWED_ACTIONS:
-            raise BuildError(f"policy map: invalid action '{action}' for category '{category_id}'")
-        category_actions[category_id] = action
-        priority = int(policy_entry.get("priority", 9999))
-        note = str(policy_entry.get("note", "")).strip()
-        if action == "UNSPECIFIED":
-            missing_policy.append(category_id)
-
-        surge_file = surge_dir / f"{category_id}.list"
-        openclash_file = openclash_dir / f"{category_id}.yaml"
-        write_surge_rules(surge_file, rules)
-        write_openclash_rules(openclash_file, rules)
-
-        non_ip_rules, ip_rules, domainset_lines_oc, ipcidr_lines, domainset_lines_surge = split_rules(rules)
-
-        write_surge_rules(dist_dir / "surge" / "non_ip" / f"{category_id}.list", non_ip_rules)
-        write_surge_rules(dist_dir / "surge" / "ip" / f"{category_id}.list", ip_rules)
-        write_plain_lines(dist_dir / "surge" / "domainset" / f"{category_id}.conf", domainset_lines_surge)
-
-        write_openclash_rules(dist_dir / "openclash" / "non_ip" / f"{category_id}.yaml", non_ip_rules)
-        write_openclash_rules(dist_dir / "openclash" / "ip" / f"{category_id}.yaml", ip_rules)
-        write_plain_lines(dist_dir / "openclash" / "domainset" / f"{category_id}.txt", domainset_lines_oc)
-        write_plain_lines(dist_dir / "openclash" / "ipcidr" / f"{category_id}.txt", ipcidr_lines)
-
-        # Compatibility tree for direct replacement of common public ruleset layouts.
-        write_surge_rules(dist_dir / "compat" / "Clash" / "non_ip" / f"{category_id}.txt", non_ip_rules)
-        write_surge_rules(dist_dir / "compat" / "Clash" / "ip" / f"{category_id}.txt", ip_rules)
-        write_plain_lines(dist_dir / "compat" / "Clash" / "domainset" / f"{category_id}.txt", domainset_lines_oc)
-        write_surge_rules(dist_dir / "compat" / "List" / "non_ip" / f"{category_id}.conf", non_ip_rules)
-        write_surge_rules(dist_dir / "compat" / "List" / "ip" / f"{category_id}.conf", ip_rules)
-        write_plain_lines(dist_dir / "compat" / "List" / "domainset" / f"{category_id}.conf", domainset_lines_surge)
-
-        metadata_categories.append(
-            {
-                "id": category_id,
-                "description": category.get("description", ""),
-                "rule_count": len(rules),
-                "surge_path": str(surge_file.relative_to(dist_dir)),
-                "openclash_path": str(openclash_file.relative_to(dist_dir)),
-                "surge_non_ip_path": str((dist_dir / "surge" / "non_ip" / f"{category_id}.list").relative_to(dist_dir)),
-                "surge_ip_path": str((dist_dir / "surge" / "ip" / f"{category_id}.list").relative_to(dist_dir)),
-                "surge_domainset_path": str((dist_dir / "surge" / "domainset" / f"{category_id}.conf").relative_to(dist_dir)),
-                "openclash_non_ip_path": str((dist_dir / "openclash" / "non_ip" / f"{category_id}.yaml").relative_to(dist_dir)),
-                "openclash_ip_path": str((dist_dir / "openclash" / "ip" / f"{category_id}.yaml").relative_to(dist_dir)),
-                "openclash_domainset_path": str((dist_dir / "openclash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
-                "openclash_ipcidr_path": str((dist_dir / "openclash" / "ipcidr" / f"{category_id}.txt").relative_to(dist_dir)),
-                "compat_clash_non_ip_path": str((dist_dir / "compat" / "Clash" / "non_ip" / f"{category_id}.txt").relative_to(dist_dir)),
-                "compat_clash_ip_path": str((dist_dir / "compat" / "Clash" / "ip" / f"{category_id}.txt").relative_to(dist_dir)),
-                "compat_clash_domainset_path": str((dist_dir / "compat" / "Clash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
-                "compat_list_non_ip_path": str((dist_dir / "compat" / "List" / "non_ip" / f"{category_id}.conf").relative_to(dist_dir)),
-                "compat_list_ip_path": str((dist_dir / "compat" / "List" / "ip" / f"{category_id}.conf").relative_to(dist_dir)),
-                "compat_list_domainset_path": str((dist_dir / "compat" / "List" / "domainset" / f"{category_id}.conf").relative_to(dist_dir)),
-                "recommended_action": action,
-                "recommended_priority": priority,
-                "recommended_note": note,
-                "sources": source_meta,
-            }
+    def run_category(category: dict[str, Any]) -> CategoryBuildResult:
+        reused = reused_results.get(str(category.get("id", "")).strip())
+        if reused is not None:
+            return reused
+        return build_and_write_category(
+            category, policy_map, dist_dir, cache_dir, offline, drop_covered_rules, write_pool
         )
 
-        # Per-category sidecar metadata for auditing and ops.
-        sidecar_dir = dist_dir / "meta"
-        sidecar_dir.mkdir(parents=True, exist_ok=True)
-        sidecar_path = sidecar_dir / f"{category_id}.json"
-        sidecar_path.write_text(
-            json.dumps(
-                {
-                    "id": category_id,
-                    "description": category.get("description", ""),
-                    "recommended_action": action,
-                    "recommended_priority": priority,
-                    "recommended_note": note,
-                    "rule_count": len(rules),
-                    "paths": {
-                        "surge": str(surge_file.relative_to(dist_dir)),
-                        "surge_non_ip": str((dist_dir / "surge" / "non_ip" / f"{category_id}.list").relative_to(dist_dir)),
-                        "surge_ip": str((dist_dir / "surge" / "ip" / f"{category_id}.list").relative_to(dist_dir)),
-                        "surge_domainset": str((dist_dir / "surge" / "domainset" / f"{category_id}.conf").relative_to(dist_dir)),
-                        "openclash": str(openclash_file.relative_to(dist_dir)),
-                        "openclash_non_ip": str((dist_dir / "openclash" / "non_ip" / f"{category_id}.yaml").relative_to(dist_dir)),
-                        "openclash_ip": str((dist_dir / "openclash" / "ip" / f"{category_id}.yaml").relative_to(dist_dir)),
-                        "openclash_domainset": str((dist_dir / "openclash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
-                        "openclash_ipcidr": str((dist_dir / "openclash" / "ipcidr" / f"{category_id}.txt").relative_to(dist_dir)),
-                        "compat_clash_non_ip": str((dist_dir / "compat" / "Clash" / "non_ip" / f"{category_id}.txt").relative_to(dist_dir)),
-                        "compat_clash_ip": str((dist_dir / "compat" / "Clash" / "ip" / f"{category_id}.txt").relative_to(dist_dir)),
-                        "compat_clash_domainset": str((dist_dir / "compat" / "Clash" / "domainset" / f"{category_id}.txt").relative_to(dist_dir)),
-                        "compat_list_non_ip": str((dist_dir / "compat" / "List" / "non_ip" / f"{category_id}.conf").relative_to(dist_dir)),
-                        "compat_list_ip": str((dist_dir / "compat" / "List" / "ip" / f"{category_id}.conf").relative_to(dist_dir)),
-                        "compat_list_domainset": str((dist_dir / "compat" / "List" / "domainset" / f"{category_id}.conf").relative_to(dist_dir))
-                    },
-                    "sources": source_meta
-                },
-                ensure_ascii=False,
-                indent=2,
+    parse_workers = parse_jobs if parse_jobs > 0 else (os.cpu_count() or 1)
+    parse_pool: ProcessPoolExecutor | None = None
+    write_pool: ThreadPoolExecutor | None = None
+    try:
+        if parse_workers > 1 and pending_categories:
+            # Spawn rather than fork: prefetch, hedge and HTTP pool threads have
+            # already run, and a forked child could inherit one of their locks held.
+            parse_pool = ProcessPoolExecutor(
+                max_workers=parse_workers,
+                mp_context=multiprocessing.get_context("spawn"),
             )
-            + "\n",
-            encoding="utf-8",
+            parse_stats = schedule_source_parses(pending_categories, cache_dir, offline, parse_pool)
+            log(f"parse pool: jobs={parse_workers} sources={parse_stats['sources']} chunks={parse_stats['chunks']}")
+
+        # Each category renders as a few streams (encode a chunk, write it to
+        # every file sharing that body); the streams of all categories share one pool.
+        if write_workers > 1:
+            write_pool = ThreadPoolExecutor(max_workers=write_workers, thread_name_prefix="write")
+
+        # Categories only share read-mostly memos once every body is fetched (or
+        # read from cache), so they can be built side by side; results are merged
+        # in config order below, which keeps every output identical to a serial run.
+        if category_workers > 1 and (offline or prefetch_stats is not None):
+            with ThreadPoolExecutor(max_workers=category_workers, thread_name_prefix="category") as pool:
+                category_results = list(pool.map(run_category, categories))
+        else:
+            category_results = [run_category(category) for category in categories]
+    finally:
+        if write_pool is not None:
+            write_pool.shutdown()
+        # Also on a failed build, so no workers or queued chunk parses are left behind.
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=True)
+            PARSE_FUTURES.clear()
+
+    rendered = [result for result in category_results if not result.reused]
+    if rendered:
+        log(
+            f"rendered {len(rendered)} categories: "
+            f"{sum(result.bytes_written for result in rendered)} bytes in "
+            f"{sum(result.render_seconds for result in rendered) * 1000.0:.1f} ms"
         )
 
-    rule_index: dict[str, list[str]] = defaultdict(list)
+    for result in category_results:
+        rules_by_category[result.category_id] = result.rules
+        category_actions[result.category_id] = result.action
+        if result.action == "UNSPECIFIED":
+            missing_policy.append(result.category_id)
+        metadata_categories.append(result.metadata)
+
+    classifier = ConflictClassifier(category_actions, ignored_conflict_sets, ignored_rule_conflicts)
+    # One index per rule type: payload -> mask of the categories listing it. Rule text
+    # is only built for rules shared by more than one category.
+    rule_index: list[dict[str, int]] = [{} for _ in RULE_TYPES]
     for category_id, rules in rules_by_category.items():
-        for rule in rules:
-            rule_index[rule].append(category_id)
-
-    reject_like = {"reject", "reject_extra", "reject_drop", "reject_no_drop"}
-    overlay_categories = {"gfw", "global", "tld_proxy"}
+        bit = classifier.bits[category_id]
+        for masks, bucket in zip(rule_index, rules.buckets):
+            for payload in bucket:
+                masks[payload] = masks.get(payload, 0) | bit
+    shared_rules = (
+        (f"{RULE_TYPES[code]},{payload}", mask)
+        for code, masks in enumerate(rule_index)
+        for payload, mask in masks.items()
+        if mask & (mask - 1)
+    )
 
     conflicts: list[dict[str, Any]] = []
-    for rule, category_ids in rule_index.items():
-        category_set = set(category_ids)
-        if len(category_set) <= 1:
-            continue
-
-        # "direct" is an aggregate convenience set. If this rule is also present in
-        # other explicit DIRECT categories, evaluate conflicts on concrete categories first.
-        if "direct" in category_set:
-            has_explicit_direct = any(
-                cid != "direct" and category_actions.get(cid, "UNSPECIFIED") == "DIRECT" for cid in category_set
-            )
-            if has_explicit_direct:
-                category_set.discard("direct")
-
-        if len(category_set) <= 1:
-            continue
-
-        frozen_set = frozenset(category_set)
-        if frozen_set in ignored_conflict_sets:
-            continue
-
-        by_rule = ignored_rule_conflicts.get(rule, set())
-        if frozen_set in by_rule:
-            continue
-
-        actions = {category_id: category_actions.get(category_id, "UNSPECIFIED") for category_id in category_set}
-        families = {action_family(v) for v in actions.values()}
-
-        # reject/reject_extra/reject_drop/reject_no_drop are intentionally split layers.
-        if category_set.issubset(reject_like):
-            continue
-
-        # Reject-family overlap with other categories is expected in ad/tracker feeds.
-        if category_set & reject_like:
-            continue
-
-        # direct is an aggregate of direct-like categories; same-action overlap is expected.
-        if "direct" in category_set:
-            non_direct_actions = {action for cid, action in actions.items() if cid != "direct"}
-            if non_direct_actions and all(action == "DIRECT" for action in non_direct_actions):
-                continue
-
-        # global/gfw/tld_proxy are overlay sets and intentionally overlap.
-        if category_set & overlay_categories:
-            continue
-
-        if len(families) <= 1:
-            conflict_type = "same_action_overlap"
-            severity = "low"
-        elif "DIRECT" in families and "PROXY" in families:
-            conflict_type = "direct_proxy_conflict"
-            severity = "high"
-        elif "DIRECT" in families and "REJECT" in families:
-            conflict_type = "direct_reject_conflict"
-            severity = "high"
-        elif "PROXY" in families and "REJECT" in families:
-            conflict_type = "proxy_reject_conflict"
-            severity = "medium"
-        else:
-            conflict_type = "cross_action_conflict"
-            severity = "medium"
-
-        conflicts.append(
-            {
-                "rule": rule,
-                "categories": sorted(category_set),
-                "actions": [
-                    {
-                        "category": cid,
-                        "action": actions[cid],
-                        "action_family": action_family(actions[cid]),
-                    }
-                    for cid in sorted(category_set)
-                ],
-                "type": conflict_type,
-                "severity": severity,
-            }
-        )
+    for rule, mask in shared_rules:
+        conflict = classifier.classify(mask, (rule,))
+        if conflict is not None:
+            conflicts.append({"rule": rule, **conflict})
 
-    severity_weight = {"high": 0, "medium": 1, "low": 2}
     conflicts.sort(
         key=lambda item: (
-            severity_weight.get(str(item.get("severity", "low")), 3),
+            SEVERITY_WEIGHT.get(str(item.get("severity", "low")), 3),
             len(item["categories"]) * -1,
             item["rule"],
         )
@@ -1378,6 +3792,26 @@ def build_all(
     medium_severity_conflict_count = sum(1 for item in conflicts if item["severity"] == "medium")
     low_severity_conflict_count = sum(1 for item in conflicts if item["severity"] == "low")
 
+    # Exact matches above miss a DOMAIN-SUFFIX in one category covering rules of another.
+    # Reported separately: clients resolve these by rule order, so they do not gate the build.
+    category_priorities = {str(item["id"]): int(item["recommended_priority"]) for item in metadata_categories}
+    suffix_conflicts = find_suffix_conflicts(
+        rule_index[RULE_ORDER["DOMAIN"]],
+        rule_index[RULE_ORDER["DOMAIN-SUFFIX"]],
+        classifier,
+        category_priorities,
+    )
+    suffix_cross_action_count = sum(1 for item in suffix_conflicts if item["type"] != "same_action_overlap")
+    suffix_high_severity_count = sum(1 for item in suffix_conflicts if item["severity"] == "high")
+    # Likewise for IP rules: nested or overlapping blocks across action families.
+    cidr_conflicts = find_cidr_conflicts(
+        rule_index[RULE_ORDER["IP-CIDR"]],
+        rule_index[RULE_ORDER["IP-CIDR6"]],
+        classifier,
+        category_priorities,
+    )
+    cidr_high_severity_count = sum(1 for item in cidr_conflicts if item["severity"] == "high")
+
     conflicts_file = dist_dir / "conflicts.json"
     conflicts_file.write_text(
         json.dumps(
@@ -1389,6 +3823,13 @@ def build_all(
                 "medium_severity_conflict_count": medium_severity_conflict_count,
                 "low_severity_conflict_count": low_severity_conflict_count,
                 "conflicts": conflicts,
+                "suffix_conflict_count": len(suffix_conflicts),
+                "suffix_cross_action_conflict_count": suffix_cross_action_count,
+                "suffix_high_severity_conflict_count": suffix_high_severity_count,
+                "suffix_conflicts": suffix_conflicts,
+                "cidr_conflict_count": len(cidr_conflicts),
+                "cidr_high_severity_conflict_count": cidr_high_severity_count,
+                "cidr_conflicts": cidr_conflicts,
             },
             ensure_ascii=False,
             indent=2,
@@ -1398,7 +3839,7 @@ def build_all(
     )
 
     fetch_report_file = dist_dir / "fetch_report.json"
-    fetch_report = build_fetch_report()
+    fetch_report = build_fetch_report(prefetch_stats)
     fetch_report_file.write_text(
         json.dumps(fetch_report, ensure_ascii=False, indent=2) + "\n",
         encoding="utf-8",
@@ -1427,6 +3868,7 @@ def build_all(
             {
                 "generated_at_utc": dt.datetime.now(dt.timezone.utc).isoformat(),
                 "policy_path": format_repo_path(policy_path),
+                "rule_count_version": RULE_COUNT_VERSION,
                 "categories": [
                     {
                         "id": c["id"],
@@ -1445,18 +3887,55 @@ def build_all(
         encoding="utf-8",
     )
 
+    write_build_state(
+        cache_dir,
+        reuse_dist_dir or dist_dir,
+        state_options,
+        {result.category_id: result.state for result in category_results},
+    )
+
+    HTTP_POOL.close()
+    cache_stats = collect_cache_garbage(
+        cache_dir,
+        keep_builds=cache_keep_builds,
+        max_bytes=cache_max_mb * 1024 * 1024,
+        record_build=True,
+    )
 
     log(f"build completed: {len(metadata_categories)} categories")
+    log(f"incremental build: rebuilt={len(category_results) - len(reused_results)} reused={len(reused_results)}")
+    subtree_lookups = V2FLY_SUBTREE_STATS["hits"] + V2FLY_SUBTREE_STATS["misses"]
+    if subtree_lookups:
+        log(
+            "v2fly include cache: "
+            f"hits={V2FLY_SUBTREE_STATS['hits']} misses={V2FLY_SUBTREE_STATS['misses']} "
+            f"hit_rate={V2FLY_SUBTREE_STATS['hits'] / subtree_lookups:.1%}"
+        )
+    parse_lookups = PARSE_CACHE_STATS["hits"] + PARSE_CACHE_STATS["misses"]
+    if parse_lookups:
+        log(
+            "parse cache: "
+            f"hits={PARSE_CACHE_STATS['hits']} misses={PARSE_CACHE_STATS['misses']} "
+            f"hit_rate={PARSE_CACHE_STATS['hits'] / parse_lookups:.1%}"
+        )
     log(
         "conflicts detected: "
         f"total={len(conflicts)} cross_action={cross_action_conflict_count} high={high_severity_conflict_count}"
     )
+    log(
+        "suffix conflicts detected: "
+        f"total={len(suffix_conflicts)} cross_action={suffix_cross_action_count} high={suffix_high_severity_count}"
+    )
+    log(f"cidr conflicts detected: total={len(cidr_conflicts)} high={cidr_high_severity_count}")
     log(
         "fetch summary: "
         f"network={fetch_report['network_success_count']} "
+        f"not_modified={fetch_report['not_modified_count']} "
         f"offline_cache={fetch_report['offline_cache_count']} "
-        f"fallback_cache={fetch_report['fallback_cache_count']}"
+        f"fallback_cache={fetch_report['fallback_cache_count']} "
+        f"retries={fetch_report['retry_count']}"
     )
+    log_cache_gc(cache_stats)
     if missing_policy:
         log(f"warning: missing policy map for categories: {', '.join(sorted(missing_policy))}")
 
@@ -1475,12 +3954,26 @@ def build_all_staged(
     offline: bool,
     fail_on_conflicts: bool,
     fail_on_cross_action_conflicts: bool,
+    fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    fetch_per_host: int = DEFAULT_FETCH_PER_HOST,
+    cache_keep_builds: int = DEFAULT_CACHE_KEEP_BUILDS,
+    cache_max_mb: int = DEFAULT_CACHE_MAX_MB,
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    fetch_retries: int = DEFAULT_FETCH_RETRIES,
+    breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+    parse_jobs: int = DEFAULT_PARSE_JOBS,
+    category_workers: int = DEFAULT_CATEGORY_WORKERS,
+    incremental: bool = True,
+    drop_covered_rules: bool = False,
+    write_workers: int = DEFAULT_WRITE_WORKERS,
 ) -> int:
     """
     Build into a fresh staging directory and atomically replace dist_dir.
 
     This avoids sync-conflict duplicate artifacts (e.g. '* 2.list') in
     cloud-synced folders by preventing in-place multi-file rewrites.
+    Categories whose inputs did not change are copied from the current
+    dist_dir instead of being rebuilt.
     """
     dist_parent = dist_dir.parent
     dist_parent.mkdir(parents=True, exist_ok=True)
@@ -1496,6 +3989,19 @@ def build_all_staged(
             offline=offline,
             fail_on_conflicts=fail_on_conflicts,
             fail_on_cross_action_conflicts=fail_on_cross_action_conflicts,
+            fetch_concurrency=fetch_concurrency,
+            fetch_per_host=fetch_per_host,
+            cache_keep_builds=cache_keep_builds,
+            cache_max_mb=cache_max_mb,
+            hedge_delay=hedge_delay,
+            fetch_retries=fetch_retries,
+            breaker_threshold=breaker_threshold,
+            parse_jobs=parse_jobs,
+            category_workers=category_workers,
+            incremental=incremental,
+            reuse_dist_dir=dist_dir,
+            drop_covered_rules=drop_covered_rules,
+            write_workers=write_workers,
         )
 
         # A final duplicate sweep in staging prevents sync-generated conflict copies.
@@ -1555,11 +4061,123 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Exit non-zero only when a rule overlaps across different action families.",
     )
+    parser.add_argument(
+        "--fetch-concurrency",
+        type=int,
+        default=DEFAULT_FETCH_CONCURRENCY,
+        help=(
+            "Number of parallel downloads in the prefetch stage; 0 disables prefetch "
+            f"(default: {DEFAULT_FETCH_CONCURRENCY})"
+        ),
+    )
+    parser.add_argument(
+        "--fetch-per-host",
+        type=int,
+        default=DEFAULT_FETCH_PER_HOST,
+        help=f"Maximum parallel downloads per host during prefetch (default: {DEFAULT_FETCH_PER_HOST})",
+    )
+    parser.add_argument(
+        "--hedge-delay",
+        type=float,
+        default=DEFAULT_HEDGE_DELAY,
+        help=(
+            "Seconds to wait for response headers before racing the next mirror URL; "
+            f"0 tries mirrors strictly in order (default: {DEFAULT_HEDGE_DELAY})"
+        ),
+    )
+    parser.add_argument(
+        "--fetch-retries",
+        type=int,
+        default=DEFAULT_FETCH_RETRIES,
+        help=(
+            "Extra attempts per URL for timeouts, resets and retryable HTTP statuses "
+            f"(default: {DEFAULT_FETCH_RETRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=DEFAULT_BREAKER_THRESHOLD,
+        help=(
+            "Consecutive retryable failures after which a host is skipped and its URLs use the cache; "
+            f"0 disables the circuit breaker (default: {DEFAULT_BREAKER_THRESHOLD})"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_PARSE_JOBS,
+        help=(
+            "Worker processes for parsing large sources; 0 uses one per CPU, 1 parses in-process "
+            f"(default: {DEFAULT_PARSE_JOBS})"
+        ),
+    )
+    parser.add_argument(
+        "--category-workers",
+        type=int,
+        default=DEFAULT_CATEGORY_WORKERS,
+        help=(
+            "Categories built concurrently once fetching has finished; 1 builds them one by one "
+            f"(default: {DEFAULT_CATEGORY_WORKERS})"
+        ),
+    )
+    parser.add_argument(
+        "--write-workers",
+        type=int,
+        default=DEFAULT_WRITE_WORKERS,
+        help=(
+            "Threads writing rendered category outputs; 1 writes them inline "
+            f"(default: {DEFAULT_WRITE_WORKERS})"
+        ),
+    )
+    parser.add_argument(
+        "--drop-covered-rules",
+        action="store_true",
+        help=(
+            "Drop DOMAIN / DOMAIN-SUFFIX rules that a broader DOMAIN-SUFFIX in the same category "
+            "already matches. Smaller lists, but lower rule counts and possibly new cross-category "
+            "conflicts where a shared rule survives in only some categories."
+        ),
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignore the incremental build state and rebuild every category.",
+    )
+    parser.add_argument(
+        "--cache-keep-builds",
+        type=int,
+        default=DEFAULT_CACHE_KEEP_BUILDS,
+        help=(
+            "Evict cache entries not used by any of the last N builds; 0 disables age eviction "
+            f"(default: {DEFAULT_CACHE_KEEP_BUILDS})"
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_MB,
+        help=f"Evict least recently used cache entries above this size; 0 disables the cap (default: {DEFAULT_CACHE_MAX_MB})",
+    )
+    parser.add_argument(
+        "--gc-cache-only",
+        action="store_true",
+        help="Only run cache garbage collection with the limits above, then exit without building.",
+    )
     return parser.parse_args()
 
 
 def main() -> int:
     args = parse_args()
+    if args.gc_cache_only:
+        stats = collect_cache_garbage(
+            args.cache_dir,
+            keep_builds=args.cache_keep_builds,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            record_build=False,
+        )
+        log_cache_gc(stats)
+        return 0
     try:
         return build_all_staged(
             config_path=args.config,
@@ -1569,6 +4187,18 @@ def main() -> int:
             offline=args.offline,
             fail_on_conflicts=args.fail_on_conflicts,
             fail_on_cross_action_conflicts=args.fail_on_cross_action_conflicts,
+            fetch_concurrency=args.fetch_concurrency,
+            fetch_per_host=args.fetch_per_host,
+            cache_keep_builds=args.cache_keep_builds,
+            cache_max_mb=args.cache_max_mb,
+            hedge_delay=args.hedge_delay,
+            fetch_retries=args.fetch_retries,
+            breaker_threshold=args.breaker_threshold,
+            parse_jobs=args.jobs,
+            category_workers=args.category_workers,
+            incremental=not args.full_rebuild,
+            drop_covered_rules=args.drop_covered_rules,
+            write_workers=args.write_workers,
         )
     except BuildError as exc:
         log(f"error: {exc}")
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import argparse
+import ipaddress
 import json
 import pathlib
 import re
@@ -52,10 +53,25 @@ def parse_allow_rules(path: pathlib.Path) -> set[str]:
             continue
 
         upper = line.upper()
+        if upper.startswith(("DOMAIN,", "DOMAIN-SUFFIX,")):
+            rule_type, value = line.split(",", 1)
+            domain = normalize_domain_token(value)
+            if domain:
+                rules.add(f"{rule_type.upper()},{domain}")
+            continue
         if upper.startswith(EXPLICIT_PREFIXES):
             rules.add(line)
             continue
 
+        try:
+            network = ipaddress.ip_network(line, strict=False)
+        except ValueError:
+            pass
+        else:
+            rule_type = "IP-CIDR" if network.version == 4 else "IP-CIDR6"
+            rules.add(f"{rule_type},{network.with_prefixlen}")
+            continue
+
         domain = normalize_domain_token(line)
         if domain:
             rules.add(f"DOMAIN-SUFFIX,{domain}")
@@ -63,6 +79,44 @@ def parse_allow_rules(path: pathlib.Path) -> set[str]:
     return rules
 
 
+def rule_network(rule: str) -> ipaddress.IPv4Network | ipaddress.IPv6Network | None:
+    if not rule.upper().startswith(("IP-CIDR,", "IP-CIDR6,")):
+        return None
+    try:
+        return ipaddress.ip_network(rule.split(",", 2)[1].strip(), strict=False)
+    except ValueError:
+        return None
+
+
+def find_leftovers(allow_rules: set[str], dist_rules: set[str]) -> list[str]:
+    """
+    Dist rules the builder should have removed for `allow_rules`.
+
+    Mirrors the build: exact matches, DOMAIN / DOMAIN-SUFFIX rules at or below
+    an allowlisted DOMAIN-SUFFIX, and IP rules overlapping an allowlisted CIDR.
+    """
+    suffixes = {rule.split(",", 1)[1] for rule in allow_rules if rule.startswith("DOMAIN-SUFFIX,")}
+    networks = [network for network in map(rule_network, allow_rules) if network is not None]
+
+    leftovers: list[str] = []
+    for rule in dist_rules:
+        if rule in allow_rules:
+            leftovers.append(rule)
+            continue
+        rule_type, _, value = rule.partition(",")
+        if rule_type in {"DOMAIN", "DOMAIN-SUFFIX"}:
+            labels = value.split(".")
+            if any(".".join(labels[index:]) in suffixes for index in range(len(labels))):
+                leftovers.append(rule)
+            continue
+        network = rule_network(rule)
+        if network is not None and any(
+            network.version == allowed.version and network.overlaps(allowed) for allowed in networks
+        ):
+            leftovers.append(rule)
+    return sorted(leftovers)
+
+
 def parse_dist_rules(path: pathlib.Path) -> set[str]:
     rules: set[str] = set()
     if not path.exists():
@@ -126,7 +180,7 @@ def main() -> int:
         dist_rules = parse_dist_rules(dist_file)
         checked += 1
 
-        leftovers = sorted(allow_rules & dist_rules)
+        leftovers = find_leftovers(allow_rules, dist_rules)
         if leftovers:
             for item in leftovers[:20]:
                 violations.append(f"{category_id}: allowlisted rule still exists -> {item}")
@@ -292,16 +292,27 @@ def main() -> int:
                 f"{item['id']}: {item['before']} -> {item['after']} "
                 f"({item['delta']:+d}, {item['delta_pct']:.2f}%)"
             )
-        violations.extend(drift_violations)
+        # Reports written before rule_count_version existed count as version 1.
+        baseline_version = baseline_payload.get("rule_count_version", 1)
+        current_version = current_payload.get("rule_count_version", 1)
+        if baseline_version != current_version:
+            log(
+                f"rule count version changed ({baseline_version} -> {current_version}), "
+                "drift reported but not gated"
+            )
+        else:
+            violations.extend(drift_violations)
 
     fetch_payload = read_json(args.fetch_report)
     try:
         fallback_cache_count = int(fetch_payload.get("fallback_cache_count", 0))
     except (TypeError, ValueError) as exc:
         raise GateError(f"{args.fetch_report}: invalid fallback_cache_count") from exc
+    # not_modified entries were revalidated with upstream (HTTP 304) and are not fallbacks.
     log(
         "fetch report "
         f"network={fetch_payload.get('network_success_count', 0)} "
+        f"not_modified={fetch_payload.get('not_modified_count', 0)} "
         f"offline_cache={fetch_payload.get('offline_cache_count', 0)} "
         f"fallback_cache={fallback_cache_count}"
     )
@@ -84,6 +84,7 @@ def main() -> int:
     high_severity = int(conflicts_payload.get("high_severity_conflict_count", 0))
 
     network = int(fetch_payload.get("network_success_count", 0))
+    not_modified = int(fetch_payload.get("not_modified_count", 0))
     offline_cache = int(fetch_payload.get("offline_cache_count", 0))
     fallback_cache = int(fetch_payload.get("fallback_cache_count", 0))
 
@@ -101,7 +102,7 @@ def main() -> int:
     )
     out.append(
         "- Fetch Summary: "
-        f"`network={network}, offline_cache={offline_cache}, fallback_cache={fallback_cache}`"
+        f"`network={network}, not_modified={not_modified}, offline_cache={offline_cache}, fallback_cache={fallback_cache}`"
     )
     out.append("")
     out.append("## Artifacts")
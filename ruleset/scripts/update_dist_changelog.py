@@ -122,6 +122,7 @@ def main() -> int:
     entry_lines.append(
         "- Fetch Summary: "
         f"network={int(fetch_payload.get('network_success_count', 0))}, "
+        f"not_modified={int(fetch_payload.get('not_modified_count', 0))}, "
         f"offline_cache={int(fetch_payload.get('offline_cache_count', 0))}, "
         f"fallback_cache={int(fetch_payload.get('fallback_cache_count', 0))}"
     )